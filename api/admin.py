@@ -1,7 +1,8 @@
 from django.contrib import admin
-from .models import User, Meal, Activity
+from .models import User, Meal, Activity, Job
 
 # Register your models here.
 admin.site.register(User)
 admin.site.register(Meal)
-admin.site.register(Activity)
\ No newline at end of file
+admin.site.register(Activity)
+admin.site.register(Job)
@@ -0,0 +1,49 @@
+# authentication.py - JWT authentication backed by a per-process User cache
+
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from . import user_cache
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that serves the token's user from the per-process user cache.
+
+    On a miss the row is loaded with one query and cached. Tokens of deleted
+    or deactivated users are rejected; a row another worker has cached can
+    outlive such a change by at most USER_CACHE_TTL seconds.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        pk = self.user_model._meta.pk
+        if api_settings.USER_ID_FIELD not in (pk.name, pk.attname):
+            # Claims naming another field still need the lookup
+            return super().get_user(validated_token)
+        user_id = pk.to_python(user_id)
+
+        row = user_cache.get(user_id)
+        if row is None:
+            user = self.user_model.objects.filter(pk=user_id).first()
+            if user is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            user_cache.remember(user)
+        else:
+            user = self.user_model.from_db(DEFAULT_DB_ALIAS, list(row), list(row.values()))
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+
+async def aload_user_fields(user, *fields):
+    """Load deferred ``fields`` of a token user from an async view, where
+    reading them lazily would run a synchronous query on the event loop."""
+    if user.get_deferred_fields().intersection(fields):
+        await user.arefresh_from_db(fields=fields)
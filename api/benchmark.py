@@ -0,0 +1,321 @@
+# benchmark.py - Endpoint benchmark harness used by api/tests.py and health/tests.py
+#
+# Every URL name gets a BenchmarkCase with a query budget. The suite seeds
+# years of history, times each case and always enforces the query budgets.
+# Wall-clock latency depends on the machine, so comparing p50/p95 against
+# benchmark_baseline.json is opt-in. Knobs (environment variables):
+#
+#   BENCH_DAYS=730             days of history seeded per user
+#   BENCH_USERS=3              users seeded (the first one is benchmarked)
+#   BENCH_REPEAT=20            timed requests per case (login/register use fewer)
+#   BENCH_COMPARE=1            fail cases slower than the baseline
+#   BENCH_TOLERANCE=1.5        allowed slowdown factor over the baseline
+#   BENCH_SLACK_MS=5           absolute slack so scheduler or GC jitter can't fail a run
+#   BENCH_UPDATE_BASELINE=1    write the measured latencies to the baseline file
+
+import gc
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from io import BytesIO, StringIO
+from itertools import count
+from pathlib import Path
+from typing import Callable, Optional
+
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.encoding import smart_bytes
+from django.utils.http import urlsafe_base64_encode
+from django.utils.timezone import now
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import changes, images, search, user_cache
+from .models import Activity, Food, Meal, Progress, User
+from .seeding import bulk_insert, generate_history
+
+BASELINE_PATH = Path(__file__).with_name("benchmark_baseline.json")
+FOOD_FIXTURE = Path(__file__).resolve().parent.parent / "food_data.json"
+PASSWORD = "bench-Passw0rd!"
+
+
+def env_number(name, default):
+    return type(default)(os.environ.get(name, default))
+
+
+def api_client(user=None):
+    """An APIClient for the test server, sending ``user``'s bearer token if given."""
+    client = APIClient(HTTP_HOST="localhost")
+    if user is not None:
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    return client
+
+
+@dataclass
+class BenchmarkCase:
+    name: str  # URL name, namespaced like "health:get_health_metrics"
+    method: str
+    path: str  # formatted with the benchmark context
+    max_queries: int
+    data: object = None  # dict, or callable(ctx) -> dict
+    auth: bool = True
+    repeat: Optional[int] = None
+    format: str = "json"  # request encoding, "multipart" for file uploads
+    prepare: Optional[Callable] = None  # callable(ctx) run untimed before each request
+
+
+def _fresh_meal(ctx):
+    ctx["meal_id"] = Meal.objects.create(user=ctx["user"], food_id=ctx["food_id"], calories=100).id
+
+
+def _sample_photo():
+    """PNG bytes of a 1600x1200 gradient standing in for an uploaded photo."""
+    photo = Image.linear_gradient("L").resize((1600, 1200)).convert("RGB")
+    buffer = BytesIO()
+    photo.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _steps_csv(ctx):
+    """A wearable-style export of 1000 step counts over the past year."""
+    rng = random.Random()
+    lines = ["date,time,steps"]
+    for _ in range(1000):
+        day = ctx["today"] - timedelta(days=rng.randrange(365))
+        lines.append(f"{day},{rng.randrange(24):02d}:{rng.randrange(60):02d}:{rng.randrange(60):02d},{rng.randrange(200, 9000)}")
+    return SimpleUploadedFile("steps.csv", "\n".join(lines).encode(), content_type="text/csv")
+
+
+def _reset_token(ctx):
+    user = User.objects.get(pk=ctx["user"].pk)
+    ctx["uidb64"] = urlsafe_base64_encode(smart_bytes(user.id))
+    ctx["reset_token"] = PasswordResetTokenGenerator().make_token(user)
+
+
+_serial = count()
+
+
+def _unique(prefix):
+    return f"{prefix}{next(_serial)}-{random.getrandbits(32)}"
+
+
+CASES = [
+    # Accounts and auth
+    BenchmarkCase("register", "post", "/api/register/", 3, auth=False, repeat=3, data=lambda ctx: {
+        "username": (name := _unique("bench")), "email": f"{name}@example.com",
+        "password": PASSWORD, "password2": PASSWORD, "gender": "female",
+    }),
+    BenchmarkCase("profile", "get", "/api/profile/", 1),
+    BenchmarkCase("profile_update", "patch", "/api/profile/update/", 3, data={"weight": 71.5}),
+    BenchmarkCase("profile_image_variant", "get", "/media/profile_pics/variants/{image_variant}", 0, auth=False),
+    BenchmarkCase("token_obtain_pair", "post", "/api/token/", 1, auth=False, repeat=3,
+                  data=lambda ctx: {"email": ctx["user"].email, "password": PASSWORD}),
+    BenchmarkCase("token_refresh", "post", "/api/token/refresh/", 1, auth=False,
+                  data=lambda ctx: {"refresh": ctx["refresh"]}),
+    BenchmarkCase("password_reset_request", "post", "/api/password-reset/request/", 2, auth=False, repeat=5,
+                  data=lambda ctx: {"email": ctx["user"].email}),
+    BenchmarkCase("password_reset_confirm", "post", "/api/password-reset/confirm/", 3, auth=False, repeat=3,
+                  prepare=_reset_token, data=lambda ctx: {
+                      "password": PASSWORD, "token": ctx["reset_token"], "uidb64": ctx["uidb64"],
+                  }),
+    # Food catalog
+    BenchmarkCase("get-all-tips", "get", "/api/tips/", 1, auth=False),
+    BenchmarkCase("get_food_list", "get", "/api/food/", 2, auth=False),
+    BenchmarkCase("food_search", "get", "/api/food/search/?q=maize%20por", 2, auth=False),
+    BenchmarkCase("get_food_details", "get", "/api/food/{food_id}/medium/", 1, auth=False),
+    BenchmarkCase("calculate_plate", "post", "/api/food/calculate/", 1, auth=False, data=lambda ctx: {
+        "items": [{"food_id": food_id, "portion_size": "medium"} for food_id in ctx["plate"]],
+    }),
+    BenchmarkCase("create_custom_food", "post", "/api/food/custom/", 5,
+                  data=lambda ctx: {"name": _unique("Bench food "), "energy_kcal": 120,
+                                    "protein": 3, "fat": 2, "carbohydrates": 20}),
+    # Meals
+    BenchmarkCase("log_meal", "post", "/api/meal/log/", 6,
+                  data=lambda ctx: {"food_id": ctx["food_id"], "portion_size": "large"}),
+    BenchmarkCase("log_meals_bulk", "post", "/api/meal/log/bulk/", 6, data=lambda ctx: {
+        "items": [{"food_id": food_id, "portion_size": "small"} for food_id in ctx["plate"]],
+    }),
+    BenchmarkCase("meal_update", "put", "/api/meals/{meal_id}/update/", 7, prepare=_fresh_meal,
+                  data={"calories": 250}),
+    BenchmarkCase("meal_delete", "delete", "/api/meals/{meal_id}/delete/", 6, prepare=_fresh_meal),
+    BenchmarkCase("meal_summary", "get", "/api/meals/summary/?date={today}", 2),
+    BenchmarkCase("dashboard", "get", "/api/dashboard/?date={today}", 8),
+    # Activity, steps and water
+    BenchmarkCase("log_activity", "post", "/api/activity/log/", 3,
+                  data={"activity_type": "running", "duration_minutes": 30}),
+    BenchmarkCase("log_steps", "post", "/api/steps/log/", 3, data={"steps": 1200}),
+    BenchmarkCase("activity_history", "get", "/api/activity/history/", 3),
+    BenchmarkCase("steps_history", "get", "/api/steps/history/", 3),
+    BenchmarkCase("log_water", "post", "/api/water/log/", 3, data={"amount": 0.25}),
+    BenchmarkCase("water_history", "get", "/api/water/history/?start_date={start}&end_date={today}", 2),
+    BenchmarkCase("rollup_history", "get",
+                  "/api/history/steps/rollup/?period=day&start_date={year_ago}&end_date={today}", 2),
+    BenchmarkCase("export_history", "get", "/api/export/?format=csv", 5, repeat=3),
+    BenchmarkCase("import_csv", "post", "/api/import/steps/", 12, repeat=5, format="multipart",
+                  data=lambda ctx: {"file": _steps_csv(ctx)}),
+    # A first sync: a full page of changes across every log type
+    BenchmarkCase("sync", "get", "/api/sync/?since=0", 5),
+    # Router viewsets
+    BenchmarkCase("user-list", "get", "/users/", 3),
+    BenchmarkCase("user-detail", "get", "/users/{user_id}/", 2),
+    BenchmarkCase("meal-list", "get", "/meals/", 3),
+    BenchmarkCase("meal-detail", "get", "/meals/{meal_id}/", 2, prepare=_fresh_meal),
+    BenchmarkCase("activity-list", "get", "/activities/", 3),
+    BenchmarkCase("activity-detail", "get", "/activities/{activity_id}/", 2),
+    BenchmarkCase("progress-list", "get", "/progress/", 3),
+    BenchmarkCase("progress-detail", "get", "/progress/{progress_id}/", 2),
+    # Health
+    # The cache key costs a query on every request so that logging meals and activities costs none
+    BenchmarkCase("health:get_health_metrics", "get", "/health/metrics/", 5),
+]
+
+# URL names that are not API endpoints and are deliberately not benchmarked
+UNBENCHMARKED = {"custom-api-root", "metrics"}
+
+
+def percentile(samples, pct):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+
+class BenchmarkTestCase(TestCase):
+    """Seeds a realistic dataset once per class and times BenchmarkCases."""
+
+    results = {}
+
+    @classmethod
+    def setUpClass(cls):
+        # Keep the image copies written by the benchmarks out of the real media root
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("load_catalog", str(FOOD_FIXTURE), stdout=StringIO())
+        foods = list(Food.objects.all())
+        days = env_number("BENCH_DAYS", 730)
+        start = now().date() - timedelta(days=days - 1)
+
+        users = []
+        for i in range(env_number("BENCH_USERS", 3)):
+            user = User.objects.create_user(
+                username=f"bench{i}", email=f"bench{i}@example.com", password=PASSWORD,
+                weight=60 + i * 7, height=1.6 + i * 0.05, age=30 + i, gender="female" if i % 2 else "male",
+                waist_circ=80 + i, hip_circ=98 + i, daily_water_goal=2.5,
+            )
+            rows = generate_history(user.id, foods, start, days, random.Random(i))
+            bulk_insert(rows)
+            for model in rows:
+                changes.record_created_after(user.id, model, 0)
+            users.append(user)
+        call_command("rebuild_nutrition_summaries", stdout=StringIO())
+        call_command("compact_rollups", all=True, stdout=StringIO())
+
+        cls.user = users[0]
+        Activity.objects.create(user=cls.user, type="run", duration=40, intensity="vigorous")
+        cls.activity = Activity.objects.filter(user=cls.user).first()
+        cls.progress = Progress.objects.create(user=cls.user, weight=70, bmi=22.9)
+
+    def setUp(self):
+        # Caches are keyed by DB-derived versions that repeat after each test's rollback
+        cache.clear()
+        search._index = None
+        user_cache.clear()
+
+    def make_context(self):
+        today = now().date()
+        food_ids = list(Food.objects.order_by("id").values_list("id", flat=True)[:8])
+        return {
+            "user": self.user,
+            "user_id": self.user.id,
+            "food_id": food_ids[0],
+            "plate": food_ids,
+            "meal_id": Meal.objects.filter(user=self.user).values_list("id", flat=True).first(),
+            "activity_id": self.activity.id,
+            "progress_id": self.progress.id,
+            "refresh": str(RefreshToken.for_user(self.user)),
+            "today": today,
+            "start": today - timedelta(days=89),
+            "year_ago": today - timedelta(days=364),
+            "image_variant": images.build_variants(_sample_photo())["128"]["webp"].rsplit("/", 1)[1],
+        }
+
+    def run_case(self, case, ctx):
+        client = api_client(self.user if case.auth else None)
+
+        samples = []
+        queries = 0
+        repeat = case.repeat or env_number("BENCH_REPEAT", 20)
+        for _ in range(repeat):
+            if case.prepare:
+                case.prepare(ctx)
+            data = case.data(ctx) if callable(case.data) else case.data
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = getattr(client, case.method)(case.path.format(**ctx), data, format=case.format)
+                # A streamed body is only produced (and queried for) as it is read
+                body = b"".join(response.streaming_content) if response.streaming else response.content
+                samples.append((time.perf_counter() - started) * 1000)
+            self.assertLess(response.status_code, 400, f"{case.name}: {response.status_code} {body[:300]!r}")
+            queries = max(queries, len(captured))
+
+        return {
+            "queries": queries,
+            "p50_ms": round(percentile(samples, 50), 3),
+            "p95_ms": round(percentile(samples, 95), 3),
+        }
+
+    def run_cases(self, cases):
+        baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        compare = os.environ.get("BENCH_COMPARE") and not os.environ.get("BENCH_UPDATE_BASELINE")
+        tolerance = env_number("BENCH_TOLERANCE", 1.5)
+        slack = env_number("BENCH_SLACK_MS", 5.0)
+        ctx = self.make_context()
+
+        # Move the seeded dataset out of the collector's reach so a full
+        # collection doesn't land inside a timed request
+        gc.collect()
+        gc.freeze()
+        self.addCleanup(gc.unfreeze)
+        for case in cases:
+            with self.subTest(endpoint=case.name):
+                result = self.run_case(case, ctx)
+                BenchmarkTestCase.results[case.name] = result
+                self.assertLessEqual(
+                    result["queries"], case.max_queries,
+                    f"{case.name} ran {result['queries']} queries (budget {case.max_queries})",
+                )
+                expected = baseline.get(case.name)
+                if expected and compare:
+                    for key in ("p50_ms", "p95_ms"):
+                        allowed = max(expected[key] * tolerance, expected[key] + slack)
+                        self.assertLessEqual(
+                            result[key], allowed,
+                            f"{case.name} {key} {result[key]:.2f}ms exceeds baseline {expected[key]:.2f}ms",
+                        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if os.environ.get("BENCH_UPDATE_BASELINE") and cls.results:
+            baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+            baseline.update({
+                name: {"p50_ms": result["p50_ms"], "p95_ms": result["p95_ms"]}
+                for name, result in cls.results.items()
+            })
+            BASELINE_PATH.write_text(json.dumps(dict(sorted(baseline.items())), indent=2) + "\n")
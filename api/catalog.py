@@ -0,0 +1,24 @@
+# catalog.py - Version counters for the reference catalogs (foods, tips)
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import CatalogVersion
+
+FOOD_CATALOG = "food"
+
+
+def get_catalog_version(name=FOOD_CATALOG):
+    """Return the current version of a catalog (0 if it was never bumped)."""
+    return CatalogVersion.objects.filter(name=name).values_list("version", flat=True).first() or 0
+
+
+def bump_catalog_version(name=FOOD_CATALOG):
+    """Mark a catalog as changed so cached renderings of it are discarded."""
+    if CatalogVersion.objects.filter(name=name).update(version=F("version") + 1):
+        return
+    try:
+        with transaction.atomic():
+            CatalogVersion.objects.create(name=name, version=1)
+    except IntegrityError:
+        CatalogVersion.objects.filter(name=name).update(version=F("version") + 1)
@@ -0,0 +1,105 @@
+# changes.py - Per-user change log behind the /api/sync/ endpoint
+#
+# Every create, update or delete of a meal, water, steps or activity entry
+# appends a Change row (deletes leave a tombstone), so a reconnecting client
+# only downloads what changed after the last cursor it saw. Ids are handed
+# out at insert time but transactions may commit in another order, which
+# could let a client read change N+1, move its cursor past N and never see
+# N. Writers therefore lock the user's row before appending: one user's
+# changes become visible in cursor order. SQLite allows a single writer at
+# a time, so it needs no lock.
+
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import ActivityLog, Change, Meal, StepLog, User, WaterLog
+from .serializers import ACTIVITY_LOG_VALUES, MEAL_VALUES, STEP_LOG_VALUES, WATER_ENTRY_VALUES
+
+# sync record type -> (model, read-only serializer of its entries)
+MODELS = {
+    "meal": (Meal, MEAL_VALUES),
+    "water": (WaterLog, WATER_ENTRY_VALUES),
+    "steps": (StepLog, STEP_LOG_VALUES),
+    "activity": (ActivityLog, ACTIVITY_LOG_VALUES),
+}
+KINDS = {model: kind for kind, (model, _) in MODELS.items()}
+# Changes sent per sync response; clients ask again while ``has_more`` is set
+PAGE_SIZE = 1000
+
+
+@contextmanager
+def _user_locked(user_id):
+    """Hold the user's row lock (until the outermost transaction ends) while appending changes."""
+    if not connection.features.has_select_for_update:
+        yield
+        return
+    with transaction.atomic():
+        list(User.objects.select_for_update().filter(pk=user_id).values_list("pk"))
+        yield
+
+
+def record(user_id, model, object_ids, deleted=False):
+    """Log a write to the entries ``object_ids`` of ``model``."""
+    rows = [Change(user_id=user_id, kind=KINDS[model], object_id=object_id, deleted=deleted) for object_id in object_ids]
+    with _user_locked(user_id):
+        if len(rows) == 1:
+            # bulk_create would wrap a single INSERT in its own transaction
+            rows[0].save(force_insert=True)
+        else:
+            Change.objects.bulk_create(rows)
+
+
+def record_created_after(user_id, model, after_id):
+    """Log the user's ``model`` entries with an id above ``after_id`` as created.
+
+    For writes that bypass the models (api.importing); a single INSERT ...
+    SELECT however many rows there are.
+    """
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(Change._meta.get_field(name).column)
+                        for name in ("user", "kind", "object_id", "deleted", "created_at"))
+    created_at = Change._meta.get_field("created_at").get_db_prep_save(timezone.now(), connection)
+    deleted = Change._meta.get_field("deleted").get_db_prep_save(False, connection)
+    with _user_locked(user_id), connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(Change._meta.db_table)} ({columns}) "
+            f"SELECT user_id, %s, id, %s, %s FROM {quote(model._meta.db_table)} "
+            f"WHERE user_id = %s AND id > %s ORDER BY id",
+            [KINDS[model], deleted, created_at, user_id, after_id],
+        )
+
+
+def changes_since(user_id, cursor, limit=None):
+    """The user's entries changed after ``cursor``, latest state only.
+
+    Returns ``{"cursor", "has_more", "changes": {kind: {"updated": [...], "deleted": [ids]}}}``.
+    Updated entries are serialized as they are now, so they may be newer
+    than the returned cursor; a later sync sends them again, which is harmless.
+    """
+    limit = PAGE_SIZE if limit is None else limit
+    rows = list(Change.objects
+                .filter(user_id=user_id, id__gt=cursor)
+                .order_by("id")
+                .values_list("id", "kind", "object_id", "deleted")[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # Only the last change to each entry matters
+    latest = {kind: {} for kind in MODELS}
+    for _, kind, object_id, deleted in rows:
+        latest[kind].pop(object_id, None)
+        latest[kind][object_id] = deleted
+
+    changes = {}
+    for kind, (model, serializer) in MODELS.items():
+        updated = [object_id for object_id, deleted in latest[kind].items() if not deleted]
+        entries = serializer.data(model.objects.filter(user_id=user_id, pk__in=updated).order_by("pk")) if updated else []
+        found = {entry["id"] for entry in entries}
+        changes[kind] = {
+            "updated": entries,
+            # Tombstones, and entries deleted after this page's last change to them
+            "deleted": [object_id for object_id, deleted in latest[kind].items() if deleted or object_id not in found],
+        }
+    return {"cursor": rows[-1][0] if rows else cursor, "has_more": has_more, "changes": changes}
@@ -0,0 +1,46 @@
+# emails.py - Account emails, sent from the job queue (api.jobs)
+
+from django.conf import settings
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.core.mail import EmailMessage, get_connection
+from django.utils.encoding import smart_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from . import jobs
+from .models import User
+
+
+@jobs.handler("password_reset_email", batch=True)
+def send_password_reset_emails(payloads):
+    """Email reset links to every queued address over one SMTP connection.
+
+    The token is made at send time, so it is valid for PASSWORD_RESET_TIMEOUT
+    from when the email goes out.
+    """
+    users = {user.email: user for user in User.objects.filter(email__in=[p["email"] for p in payloads])}
+    token_generator = PasswordResetTokenGenerator()
+    errors = []
+    with get_connection() as connection:
+        for payload in payloads:
+            user = users.get(payload["email"])
+            if user is None:  # deleted or changed their email since asking
+                errors.append(None)
+                continue
+            uidb64 = urlsafe_base64_encode(smart_bytes(user.id))
+            token = token_generator.make_token(user)
+
+            # Construct reset URL (you'd ideally have a frontend to handle this)
+            reset_url = f"{settings.FRONTEND_BASE_URL}/reset-password?uidb64={uidb64}&token={token}"
+            message = EmailMessage(
+                subject="Reset Your Password",
+                body=f"Click the link to reset your password: {reset_url}",
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[user.email],
+                connection=connection,
+            )
+            try:
+                message.send()
+                errors.append(None)
+            except Exception as exc:
+                errors.append(exc)
+    return errors
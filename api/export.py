@@ -0,0 +1,109 @@
+# export.py - A user's whole logged history as one chronological NDJSON or CSV stream
+#
+# Each table is read in timestamp order with a chunked iterator and the
+# streams are merged as they go, so memory stays flat however many rows a
+# user has. Output is buffered into pieces of about FLUSH_BYTES and can be
+# gzipped on the fly.
+
+import csv
+import heapq
+import io
+import json
+import zlib
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+
+from .models import ActivityLog, Meal, Progress, StepLog, WaterLog
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# Rows fetched per round trip from each table
+CHUNK_SIZE = 2000
+FLUSH_BYTES = 64 * 1024
+
+# record type -> (model, timestamp field(s), {exported column: model field})
+SOURCES = {
+    "meal": (Meal, ("timestamp",), {
+        "food": "food__name", "portion_size": "portion_size", "calories": "calories",
+        "protein": "protein", "fat": "fat", "carbohydrates": "carbohydrates",
+    }),
+    "water": (WaterLog, ("timestamp",), {"amount": "amount"}),
+    "steps": (StepLog, ("date", "time"), {"steps": "steps"}),
+    "activity": (ActivityLog, ("date", "time"), {
+        "activity_type": "activity_type", "duration_minutes": "duration_minutes",
+        "calories_burned": "calories_burned",
+    }),
+    "progress": (Progress, ("date_logged",), {"weight": "weight", "bmi": "bmi"}),
+}
+CSV_COLUMNS = ["type", "timestamp"] + list(dict.fromkeys(
+    column for _, _, columns in SOURCES.values() for column in columns
+))
+
+
+def _records(user_id, record_type):
+    """(timestamp, type, {column: value}) for one table, oldest first."""
+    model, when, columns = SOURCES[record_type]
+    rows = (model.objects.filter(user_id=user_id)
+            .order_by(*when, "pk")
+            .values_list(*when, *columns.values()))
+    names = list(columns)
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        if len(when) == 2:
+            # Step and activity logs store the server's (UTC) date and time separately
+            at = datetime.combine(row[0], row[1], tzinfo=dt_timezone.utc)
+        else:
+            at = row[0]
+        yield at, record_type, dict(zip(names, row[len(when):]))
+
+
+def _lines(user_id, fmt):
+    records = heapq.merge(*(_records(user_id, record_type) for record_type in SOURCES), key=lambda r: r[0])
+    if fmt == "ndjson":
+        for at, record_type, values in records:
+            yield json.dumps({"type": record_type, "timestamp": at.isoformat(), **values}) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, CSV_COLUMNS)
+    writer.writeheader()
+    for at, record_type, values in records:
+        writer.writerow({"type": record_type, "timestamp": at.isoformat(), **values})
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def stream_history(user_id, fmt, compress=False):
+    """Yield the export as byte strings of about FLUSH_BYTES each."""
+    compressor = zlib.compressobj(wbits=31) if compress else None  # gzip container
+    pending, size = [], 0
+    for line in _lines(user_id, fmt):
+        pending.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            piece = "".join(pending).encode()
+            pending, size = [], 0
+            piece = compressor.compress(piece) if compressor else piece
+            if piece:
+                yield piece
+    piece = "".join(pending).encode()
+    if compressor:
+        piece = compressor.compress(piece) + compressor.flush()
+    if piece:
+        yield piece
+
+
+async def aiterate(chunks):
+    """Consume a sync ``chunks`` generator from the request's sync thread.
+
+    Under ASGI, Django would otherwise read a sync streaming response into a
+    list before sending it. Each step hops to the same thread, which keeps
+    the ORM cursors of ``stream_history`` on the connection that opened them.
+    """
+    step = sync_to_async(next)
+    done = object()
+    try:
+        while (chunk := await step(chunks, done)) is not done:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
@@ -0,0 +1,125 @@
+# fast_serializers.py - Read-only ModelSerializer output built straight from database rows
+#
+# A ModelSerializer builds a model instance for every row and then walks its
+# field objects for every value. ValuesSerializer inspects the serializer's
+# fields once, fetches only their columns with .values_list() and converts
+# each value with a converter chosen up front. Ints and strings pass through
+# unchanged, floats go through float(), and ISO dates, times and datetimes
+# through isoformat(). Anything else uses the DRF field's own
+# to_representation.
+# The output is the serializer's own; api/tests.py compares the two byte
+# for byte.
+
+from datetime import date, time
+
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# DRF fields whose representation of a database value is the value itself
+_UNCHANGED = {
+    serializers.IntegerField.to_representation,
+    serializers.CharField.to_representation,
+    serializers.BooleanField.to_representation,
+}
+
+
+def _is_iso(field, setting):
+    output_format = getattr(field, "format", getattr(api_settings, setting))
+    return isinstance(output_format, str) and output_format.lower() == ISO_8601
+
+
+class _IsoDatetime:
+    """DateTimeField.to_representation for the aware datetimes the ORM returns with USE_TZ.
+
+    The current time zone can change per request and is slow to look up,
+    so render() binds it once per call.
+    """
+
+    def __init__(self, field):
+        self.field = field
+
+    def bind(self):
+        field = self.field
+        zone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+
+        def convert(value):
+            if zone is None or timezone.is_naive(value):
+                return field.to_representation(value)
+            text = value.astimezone(zone).isoformat()
+            return text[:-6] + "Z" if text.endswith("+00:00") else text
+        return convert
+
+
+def _converter(field):
+    """Callable turning a non-null column value into ``field``'s output, or None to keep it."""
+    to_representation = type(field).to_representation
+    if to_representation in _UNCHANGED:
+        return None
+    if to_representation is serializers.FloatField.to_representation:
+        return float
+    if to_representation is serializers.DateField.to_representation and _is_iso(field, "DATE_FORMAT"):
+        return date.isoformat
+    if to_representation is serializers.TimeField.to_representation and _is_iso(field, "TIME_FORMAT"):
+        return time.isoformat
+    if to_representation is serializers.DateTimeField.to_representation and _is_iso(field, "DATETIME_FORMAT"):
+        return _IsoDatetime(field)
+    return field.to_representation
+
+
+class ValuesSerializer:
+    """Renders what ``serializer_class(queryset, many=True).data`` would, without model instances.
+
+    Only serializers made of plain model fields and primary key relations
+    are supported; anything needing the instance raises TypeError here.
+    """
+
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+        if type(serializer).to_representation is not serializers.Serializer.to_representation:
+            raise TypeError(f"{serializer_class.__name__} customizes to_representation")
+        model = serializer.Meta.model
+        self.names, self.columns, self.converters = [], [], []
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+            unsupported = (
+                len(field.source_attrs) != 1
+                or isinstance(field, (serializers.BaseSerializer, serializers.ManyRelatedField, serializers.FileField))
+                or (isinstance(field, serializers.RelatedField)
+                    and not (isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None))
+            )
+            if unsupported:
+                raise TypeError(f"{serializer_class.__name__}.{field.field_name} needs the model instance")
+            column = model._meta.get_field(field.source_attrs[0])
+            self.names.append(field.field_name)
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                # The foreign key column already holds the pk the field outputs
+                self.columns.append(column.attname)
+                self.converters.append(None)
+            else:
+                self.columns.append(column.name)
+                self.converters.append(_converter(field))
+        self.plain = not any(self.converters)
+
+    def rows(self, queryset):
+        """``queryset`` narrowed to the serialized columns, for paginating or slicing."""
+        return queryset.values_list(*self.columns)
+
+    def render(self, rows):
+        """Output for rows of ``rows()``, as a list of dicts."""
+        names = self.names
+        if self.plain:
+            return [dict(zip(names, row)) for row in rows]
+        converters = [convert.bind() if isinstance(convert, _IsoDatetime) else convert for convert in self.converters]
+        return [
+            dict(zip(names, [
+                value if convert is None or value is None else convert(value)
+                for convert, value in zip(converters, row)
+            ]))
+            for row in rows
+        ]
+
+    def data(self, queryset):
+        return self.render(self.rows(queryset))
+
@@ -0,0 +1,17 @@
+# hashers.py - PBKDF2 password hasher with a configurable work factor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 using ``settings.PASSWORD_HASH_ITERATIONS`` iterations.
+
+    When the setting is 0, Django's own count is used. The algorithm name is
+    unchanged, so existing hashes verify as before and check_password()
+    rehashes them to the configured count on the next successful login.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS or super().iterations
@@ -0,0 +1,74 @@
+# images.py - Resized copies of uploaded profile images, built by the job worker
+#
+# Each upload is decoded once and written as WebP and JPEG copies bounded to
+# every size in PROFILE_IMAGE_SIZES. Copies are named after the SHA-256 of
+# the original bytes, so identical uploads share them and a name never
+# changes content (they are served with immutable cache headers).
+
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from . import jobs
+from .models import User
+
+VARIANT_DIR = "profile_pics/variants"
+# format -> (file extension, Pillow save options)
+FORMATS = {
+    "webp": ("webp", {"format": "WEBP", "quality": 80, "method": 4}),
+    "jpeg": ("jpg", {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def variant_names(digest):
+    """{size: {format: storage name}} of the copies of the image with ``digest``."""
+    return {
+        str(size): {fmt: f"{VARIANT_DIR}/{digest}-{size}.{ext}" for fmt, (ext, _) in FORMATS.items()}
+        for size in settings.PROFILE_IMAGE_SIZES
+    }
+
+
+def build_variants(data):
+    """Write the resized copies of the image in ``data`` unless they exist; returns their names."""
+    names = variant_names(hashlib.sha256(data).hexdigest())
+    missing = [name for by_format in names.values() for name in by_format.values() if not default_storage.exists(name)]
+    if not missing:
+        return names
+
+    image = Image.open(BytesIO(data))
+    # Let the JPEG decoder downscale by up to 8x while decoding, far cheaper than a full decode
+    largest = max(settings.PROFILE_IMAGE_SIZES)
+    image.draft("RGB", (largest, largest))
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    image = image.convert("RGBA" if has_alpha else "RGB")
+
+    # Largest first, each copy shrunk from the previous one
+    for size in sorted(settings.PROFILE_IMAGE_SIZES, reverse=True):
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        for fmt, (_, options) in FORMATS.items():
+            name = names[str(size)][fmt]
+            if name not in missing:
+                continue
+            frame = image
+            if has_alpha and fmt == "jpeg":
+                frame = Image.new("RGB", image.size, "white")
+                frame.paste(image, mask=image.getchannel("A"))
+            buffer = BytesIO()
+            frame.save(buffer, **options)
+            # Another worker may have written the same copy meanwhile; the
+            # storage would save ours under a new name, which nothing refers to
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+    return names
+
+
+@jobs.handler("profile_image_variants")
+def build_profile_image_variants(user_id, image):
+    with default_storage.open(image) as file:
+        variants = build_variants(file.read())
+    # Skip users who uploaded another image since this job was queued
+    User.objects.filter(pk=user_id, image=image).update(image_variants=variants)
@@ -0,0 +1,193 @@
+# importing.py - Bulk import of step and activity history from wearable CSV exports
+#
+# Files are parsed in chunks of CHUNK_ROWS with pandas and each chunk is
+# validated column-wise; rejected rows are reported by line number. Rows
+# already stored (same user, date, time and values) are skipped, so an
+# export can be uploaded again safely. Accepted rows are written with COPY
+# on Postgres and batched INSERTs elsewhere, bypassing the models: the
+# date/time fields are auto_now_add and would be overwritten with today.
+# bulk_create-style writes send no signals, so the new rows are added to the
+# sync change log per chunk (which also moves cached health metrics on) and
+# the rollups are brought up to date once at the end.
+
+import csv
+import io
+import time
+
+import pandas as pd
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import changes
+from .models import ActivityLog, StepLog
+from .rollups import SOURCE_METRICS, rebuild_rollups
+
+CHUNK_ROWS = 50000
+# Rejected rows listed in a report; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+MAX_STEPS = 200000  # per row
+MAX_DURATION_MINUTES = 24 * 60
+# Validated as whole numbers, stored as integers
+INTEGER_COLUMNS = {"steps", "duration_minutes"}
+
+
+class ImportFormatError(ValueError):
+    """The file as a whole can't be imported (not CSV, missing columns, ...)."""
+
+
+def _validate_steps(chunk, reject):
+    steps = pd.to_numeric(chunk["steps"], errors="coerce")
+    reject(steps.isna() | (steps % 1 != 0) | (steps < 0) | (steps > MAX_STEPS),
+           f"steps must be a whole number from 0 to {MAX_STEPS}")
+    return {"steps": steps}
+
+
+def _validate_activity(chunk, reject):
+    activity_type = chunk["activity_type"]
+    reject((activity_type == "") | (activity_type.str.len() > 100), "activity_type must be 1 to 100 characters")
+    duration = pd.to_numeric(chunk["duration_minutes"], errors="coerce")
+    reject(duration.isna() | (duration % 1 != 0) | (duration < 1) | (duration > MAX_DURATION_MINUTES),
+           f"duration_minutes must be a whole number from 1 to {MAX_DURATION_MINUTES}")
+    calories = chunk.get("calories_burned", pd.Series("", index=chunk.index))
+    burned = pd.to_numeric(calories, errors="coerce")
+    reject(((calories != "") & burned.isna()) | (burned < 0), "calories_burned must be a non-negative number")
+    return {"activity_type": activity_type, "duration_minutes": duration, "calories_burned": burned}
+
+
+# kind -> (model, required columns, optional columns, validator)
+KINDS = {
+    "steps": (StepLog, ["date", "steps"], ["time"], _validate_steps),
+    "activity": (ActivityLog, ["date", "activity_type", "duration_minutes"], ["time", "calories_burned"],
+                 _validate_activity),
+}
+
+
+def _validate(kind, chunk):
+    """Split a chunk into a frame of clean column values and a Series of errors by row."""
+    _, _, _, validate_values = KINDS[kind]
+    errors = pd.Series("", index=chunk.index)
+
+    def reject(mask, message):
+        # Keep the first problem found in each row
+        errors[mask.fillna(False).astype(bool) & (errors == "")] = message
+
+    day = pd.to_datetime(chunk["date"], format="%Y-%m-%d", errors="coerce")
+    reject(day.isna(), "date must be YYYY-MM-DD")
+    reject(day > pd.Timestamp(timezone.localdate()), "date is in the future")
+
+    # Daily totals often come without a time; they're stored at midnight
+    clock = chunk.get("time", pd.Series("", index=chunk.index)).replace("", "00:00:00")
+    clock = clock.where(clock.str.len() != 5, clock + ":00")
+    moment = pd.to_datetime(clock, format="%H:%M:%S", errors="coerce")
+    reject(moment.isna(), "time must be HH:MM or HH:MM:SS")
+
+    values = validate_values(chunk, reject)
+    valid = errors == ""
+    clean = pd.DataFrame({"date": day[valid].dt.date, "time": moment[valid].dt.time})
+    for column, series in values.items():
+        series = series[valid]
+        if column in INTEGER_COLUMNS:
+            series = series.astype("int64")
+        elif pd.api.types.is_float_dtype(series):
+            series = series.astype(object).where(series.notna(), None)
+        clean[column] = series
+    return clean, errors[~valid]
+
+
+def _existing_keys(model, user_id, columns, frame):
+    """Keys of rows the user already has in the chunk's date range."""
+    rows = (model.objects
+            .filter(user_id=user_id, date__range=(frame["date"].min(), frame["date"].max()))
+            .values_list(*columns))
+    return set(rows)
+
+
+def _insert(user_id, model, columns, rows):
+    table = connection.ops.quote_name(model._meta.db_table)
+    names = ", ".join(connection.ops.quote_name(model._meta.get_field(column).column) for column in columns)
+    # Rows above the table's last id are ours (or the user's concurrent writes, logged twice at worst)
+    last_id = model.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == "postgresql" and hasattr(cursor.cursor, "copy_expert"):
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)  # None becomes an empty, i.e. NULL, field
+            buffer.seek(0)
+            cursor.cursor.copy_expert(f"COPY {table} ({names}) FROM STDIN WITH (FORMAT csv)", buffer)
+        else:
+            # What the ORM does to each value (dates and times become strings on
+            # SQLite), once per distinct value: imports repeat them a lot
+            prepared = []
+            for column, values in zip(columns, zip(*rows)):
+                to_db = model._meta.get_field(column).get_db_prep_save
+                converted = {value: to_db(value, connection) for value in set(values)}
+                prepared.append([converted[value] for value in values])
+            rows = list(zip(*prepared))
+            placeholders = ", ".join(["%s"] * len(columns))
+            cursor.executemany(f"INSERT INTO {table} ({names}) VALUES ({placeholders})", rows)
+        changes.record_created_after(user_id, model, last_id)
+
+
+def _refresh_derived(user_id, model, first_day):
+    """Bring the rollups up to date after an import."""
+    rebuild_rollups(SOURCE_METRICS[model], user_id=user_id, since=first_day)
+
+
+def import_csv(user_id, kind, file, chunk_rows=CHUNK_ROWS):
+    """Import one CSV file of ``kind`` ("steps" or "activity") for a user and report on it."""
+    model, required, optional, _ = KINDS[kind]
+    started = time.perf_counter()
+    report = {"kind": kind, "rows": 0, "imported": 0, "duplicates": 0, "rejected": 0, "errors": []}
+    first_day = None
+    try:
+        chunks = pd.read_csv(file, dtype=str, keep_default_na=False, chunksize=chunk_rows,
+                             skipinitialspace=True, encoding="utf-8-sig")
+        for chunk in chunks:
+            chunk.columns = [str(column).strip().lower() for column in chunk.columns]
+            missing = [column for column in required if column not in chunk.columns]
+            if missing:
+                raise ImportFormatError(f"Missing columns: {', '.join(missing)}")
+            chunk = chunk[[column for column in required + optional if column in chunk.columns]]
+            chunk = chunk.apply(lambda column: column.str.strip())
+
+            clean, errors = _validate(kind, chunk)
+            report["rows"] += len(chunk)
+            report["rejected"] += len(errors)
+            room = MAX_REPORTED_ERRORS - len(report["errors"])
+            # The index runs on across chunks; line 1 is the header
+            report["errors"] += [
+                {"line": index + 2, "error": message} for index, message in errors.head(max(room, 0)).items()
+            ]
+            if clean.empty:
+                continue
+
+            columns = list(clean.columns)
+            key_columns = [column for column in columns if column != "calories_burned"]
+            # tolist() hands back plain Python values; DB drivers don't adapt numpy scalars
+            rows = list(zip(*(clean[column].tolist() for column in columns)))
+            existing = _existing_keys(model, user_id, key_columns, clean)
+            key_positions = [columns.index(column) for column in key_columns]
+            seen = set()
+            fresh = []
+            for row in rows:
+                key = tuple(row[position] for position in key_positions)
+                if key not in existing and key not in seen:
+                    seen.add(key)
+                    fresh.append((user_id, *row))
+            report["duplicates"] += len(rows) - len(fresh)
+            if fresh:
+                _insert(user_id, model, ["user_id", *columns], fresh)
+                report["imported"] += len(fresh)
+                chunk_first = min(clean["date"])
+                first_day = chunk_first if first_day is None else min(first_day, chunk_first)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as exc:
+        raise ImportFormatError(
+            f"Not a readable CSV file ({report['imported']} rows imported before the error): {exc}"
+        ) from exc
+    finally:
+        if first_day is not None:
+            _refresh_derived(user_id, model, first_day)
+
+    seconds = time.perf_counter() - started
+    report["seconds"] = round(seconds, 3)
+    report["rows_per_second"] = round(report["rows"] / seconds) if seconds else None
+    return report
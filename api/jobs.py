@@ -0,0 +1,121 @@
+# jobs.py - Background job queue stored in the database, run by ``manage.py run_jobs``
+#
+# enqueue() inserts a Job row; workers claim due rows, run the handler
+# registered for their kind and delete them on success. A failed attempt is
+# retried with exponential backoff until the job runs out of attempts, then
+# kept with status "failed" and its last traceback. Postgres workers claim
+# rows with SELECT ... FOR UPDATE SKIP LOCKED so they never wait on each
+# other; SQLite has no row locks but serializes writes, so there a
+# conditional UPDATE is the claim.
+
+import random
+import traceback
+from datetime import timedelta
+
+from django.db import connection, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+# Delay before the first retry, doubled for every further attempt up to the cap
+RETRY_BASE_DELAY = timedelta(seconds=10)
+RETRY_MAX_DELAY = timedelta(hours=1)
+# A job still running after this long is assumed lost with its worker and retried
+LOCK_TIMEOUT = timedelta(minutes=10)
+
+_handlers = {}  # kind -> (function, batch)
+
+
+def handler(kind, batch=False):
+    """Register the function that runs jobs of ``kind``.
+
+    Plain handlers are called with the job's payload as keyword arguments.
+    Batch handlers receive the payloads of every claimed job of their kind
+    at once and return one exception, or None for success, per payload.
+    """
+    def register(func):
+        _handlers[kind] = (func, batch)
+        return func
+    return register
+
+
+def is_batched(kind):
+    return kind in _handlers and _handlers[kind][1]
+
+
+def enqueue(kind, payload=None, delay=None, max_attempts=5):
+    """Queue a job; it runs after the current transaction commits, if any."""
+    if kind not in _handlers:
+        raise LookupError(f"No job handler registered for {kind!r}")
+    return Job.objects.create(
+        kind=kind, payload=payload or {}, max_attempts=max_attempts,
+        run_at=timezone.now() + (delay or timedelta()),
+    )
+
+
+def claim(worker, limit):
+    """Mark up to ``limit`` due jobs as running for ``worker`` and return them."""
+    now = timezone.now()
+    due = Q(status=Job.QUEUED, run_at__lte=now) | Q(status=Job.RUNNING, locked_at__lt=now - LOCK_TIMEOUT)
+    candidates = Job.objects.filter(due).order_by("run_at").values_list("pk", flat=True)
+    claimed = {"status": Job.RUNNING, "locked_by": worker, "locked_at": now, "attempts": F("attempts") + 1}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(candidates.select_for_update(skip_locked=True)[:limit])
+            Job.objects.filter(pk__in=ids).update(**claimed)
+    else:
+        # Rows another worker claimed since the SELECT no longer match ``due``
+        ids = list(candidates[:limit])
+        Job.objects.filter(due, pk__in=ids).update(**claimed)
+    return list(Job.objects.filter(pk__in=ids, locked_by=worker, locked_at=now).order_by("run_at"))
+
+
+def execute(kind, payloads):
+    """Run the handler for ``kind`` over ``payloads`` in a worker thread or process.
+
+    Returns one formatted traceback, or None, per payload.
+    """
+    try:
+        func, batch = _handlers[kind]
+        if batch:
+            errors = func(payloads)
+        else:
+            errors = []
+            for payload in payloads:
+                try:
+                    func(**payload)
+                    errors.append(None)
+                except Exception as exc:
+                    errors.append(exc)
+    except Exception as exc:
+        errors = [exc] * len(payloads)
+    finally:
+        # Pool threads and processes would otherwise each keep a connection open
+        connections.close_all()
+    return [None if error is None else "".join(traceback.format_exception(error)) for error in errors]
+
+
+def retry_delay(attempts):
+    delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+    # Jitter so jobs that failed together (e.g. an SMTP outage) don't retry in lockstep
+    return delay * random.uniform(0.8, 1.2)
+
+
+def finish(job, error):
+    """Record the outcome of a claimed job: delete it, requeue it or mark it failed.
+
+    Returns the job's new status, or None if it was deleted.
+    """
+    # Matching locked_at skips jobs another worker reclaimed after LOCK_TIMEOUT
+    mine = Job.objects.filter(pk=job.pk, locked_at=job.locked_at)
+    if error is None:
+        mine.delete()
+        return None
+    if job.attempts >= job.max_attempts:
+        status, run_at = Job.FAILED, job.run_at
+    else:
+        status, run_at = Job.QUEUED, timezone.now() + retry_delay(job.attempts)
+    mine.update(status=status, run_at=run_at, locked_by="", locked_at=None, last_error=error)
+    return status
@@ -0,0 +1,93 @@
+import statistics
+import time
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.hashers import ConfigurablePBKDF2PasswordHasher
+from api.models import User
+
+PASSWORD = "bench-Passw0rd!"
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure logins per second per core through POST /api/token/ with the configured "
+        "password hasher, and the password check alone at other PBKDF2 iteration counts. "
+        "The throwaway user is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=20, help="Timed logins.")
+        parser.add_argument("--iterations", type=int, action="append",
+                            help="PBKDF2 iteration count to compare the password check at "
+                                 "(repeatable, default Django's and the configured one).")
+
+    def handle(self, *args, **options):
+        if options["logins"] < 2:
+            raise CommandError("--logins must be at least 2.")
+        hasher = get_hasher()
+        work = f", {hasher.iterations} iterations" if isinstance(hasher, PBKDF2PasswordHasher) else ""
+        self.stdout.write(f"Configured hasher: {hasher.algorithm}{work}")
+
+        counts = options["iterations"] or sorted({PBKDF2PasswordHasher.iterations, ConfigurablePBKDF2PasswordHasher().iterations}, reverse=True)
+        for iterations in counts:
+            encoded = PBKDF2PasswordHasher().encode(PASSWORD, "benchsalt", iterations)
+            cpu = self._cpu_seconds(lambda: PBKDF2PasswordHasher().verify(PASSWORD, encoded), 5)
+            self.stdout.write(f"  password check, {iterations:>7d} iterations: {cpu * 1000:7.1f} ms CPU, {1 / cpu:6.1f} checks/s per core")
+
+        try:
+            with transaction.atomic():
+                self._bench_logins(options["logins"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _bench_logins(self, logins):
+        user = User.objects.create_user(username="login-bench", email="login-bench@example.com", password=PASSWORD)
+        # Start from a hash at Django's default work factor to show the upgrade on first login
+        User.objects.filter(pk=user.pk).update(
+            password=PBKDF2PasswordHasher().encode(PASSWORD, PBKDF2PasswordHasher().salt())
+        )
+        client = APIClient(HTTP_HOST="localhost")
+        data = {"email": user.email, "password": PASSWORD}
+
+        def login():
+            response = client.post("/api/token/", data, format="json")
+            if response.status_code != 200:
+                raise CommandError(f"Login failed: {response.status_code} {response.content[:200]!r}")
+
+        before = User.objects.get(pk=user.pk).password
+        login()
+        after = User.objects.get(pk=user.pk).password
+        self.stdout.write(f"Rehashed on first login: {'yes' if before != after else 'no'} "
+                          f"({before.split('$')[1]} -> {after.split('$')[1]} iterations)")
+
+        wall, cpu = [], []
+        with CaptureQueriesContext(connection) as captured:
+            for _ in range(logins):
+                started, started_cpu = time.perf_counter(), time.process_time()
+                login()
+                wall.append(time.perf_counter() - started)
+                cpu.append(time.process_time() - started_cpu)
+        self.stdout.write(
+            f"{logins} logins: p50 {statistics.median(wall) * 1000:.1f} ms, "
+            f"{statistics.median(cpu) * 1000:.1f} ms CPU, {logins / sum(cpu):.1f} logins/s per core, "
+            f"{len(captured) / logins:.1f} queries per login"
+        )
+
+    @staticmethod
+    def _cpu_seconds(func, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = time.process_time()
+            func()
+            samples.append(time.process_time() - started)
+        return statistics.median(samples)
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+
+from api.models import ActivityLog, Food, Meal, StepLog, User, WaterLog
+from api.serializers import (
+    ACTIVITY_LOG_VALUES, FOOD_VALUES, MEAL_VALUES, STEP_LOG_VALUES, WATER_ENTRY_VALUES,
+    ActivityLogSerializer, FoodSerializer, MealSerializer, StepLogSerializer, WaterEntrySerializer,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows per second of the DRF serializers and their read-only .values() "
+        "renderings (api.fast_serializers) on the food list and one user's histories, "
+        "from query to JSON bytes, and check both produce the same bytes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Email of the user whose histories are rendered "
+                                           "(default: the one with the most step entries).")
+        parser.add_argument("--limit", type=int, default=50000, help="Most rows rendered per list.")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per list; the fastest counts.")
+
+    def handle(self, *args, **options):
+        if options["user"]:
+            user = User.objects.filter(email=options["user"]).first()
+        else:
+            user = User.objects.annotate(entries=Count("steplog")).order_by("-entries").first()
+        if user is None:
+            raise CommandError("No such user.")
+        self.stdout.write(f"Histories of {user.email}, at most {options['limit']} rows each")
+
+        lists = [
+            ("food list", FOOD_VALUES, FoodSerializer, Food.objects.all()),
+            ("meals", MEAL_VALUES, MealSerializer, Meal.objects.filter(user=user)),
+            ("water history", WATER_ENTRY_VALUES, WaterEntrySerializer, WaterLog.objects.filter(user=user)),
+            ("activity history", ACTIVITY_LOG_VALUES, ActivityLogSerializer, ActivityLog.objects.filter(user=user)),
+            ("steps history", STEP_LOG_VALUES, StepLogSerializer, StepLog.objects.filter(user=user)),
+        ]
+        renderer = JSONRenderer()
+        for name, values, serializer_class, queryset in lists:
+            queryset = queryset.order_by("-pk")[:options["limit"]]
+            rows = queryset.count()
+            if not rows:
+                self.stdout.write(f"  {name:<17} no rows")
+                continue
+            drf, drf_body = self._best(lambda: renderer.render(serializer_class(queryset, many=True).data),
+                                       options["repeat"])
+            fast, fast_body = self._best(lambda: renderer.render(values.data(queryset)), options["repeat"])
+            if fast_body != drf_body:
+                raise CommandError(f"{name}: output differs from {serializer_class.__name__}")
+            self.stdout.write(
+                f"  {name:<17} {rows:>7} rows: {rows / drf:>10,.0f} rows/s with {serializer_class.__name__}, "
+                f"{rows / fast:>10,.0f} rows/s from values ({drf / fast:.1f}x)"
+            )
+
+    @staticmethod
+    def _best(render, repeat):
+        """Fastest of ``repeat`` runs in seconds, and the rendered bytes."""
+        best = None
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            body = render()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, body
@@ -0,0 +1,29 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.rollups import ROLLUP_SOURCES, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute day MetricRollup rows from the raw logs. By default only past "
+        "days (before today) are rewritten."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--metric", choices=list(ROLLUP_SOURCES), action="append",
+                            help="Metric to compact (repeatable, default all).")
+        parser.add_argument("--user", type=int, help="Only compact this user id.")
+        parser.add_argument("--since", type=date.fromisoformat,
+                            help="Only recompute days on or after this date (YYYY-MM-DD).")
+        parser.add_argument("--all", action="store_true",
+                            help="Also rebuild today's rows, e.g. for the initial backfill.")
+
+    def handle(self, *args, **options):
+        before = None if options["all"] else timezone.localdate()
+        for metric in options["metric"] or ROLLUP_SOURCES:
+            written = rebuild_rollups(metric, user_id=options["user"], since=options["since"], before=before)
+            self.stdout.write(f"{metric}: {written} rows")
+        self.stdout.write(self.style.SUCCESS("Rollups compacted."))
@@ -0,0 +1,127 @@
+import multiprocessing
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils.timezone import now
+
+from api import changes
+from api.models import Food, User
+from api.nutrition import rebuild_summaries
+from api.rollups import ROLLUP_SOURCES, rebuild_rollups
+from api.seeding import bulk_insert, generate_history, generate_profile
+
+# Set in each worker before it starts generating (inherited on fork)
+_foods = None
+
+
+def _user_rng(seed, index):
+    # Seeded per user index, so the data doesn't depend on how work is split
+    return random.Random(f"{seed}:{index}")
+
+
+def _generate_users(task):
+    """Worker: write the history of a slice of users, return rows written."""
+    user_rows, seed, start, days, batch_size, aggregates = task
+    written = 0
+    for index, user_id in user_rows:
+        rows = generate_history(user_id, _foods, start, days, _user_rng(seed, index))
+        written += sum(bulk_insert(rows, batch_size=batch_size).values())
+        for model in rows:
+            # The users are new, so every row of theirs goes into the sync change log
+            changes.record_created_after(user_id, model, 0)
+        if aggregates:
+            # bulk_insert skips the signals; build this user's aggregates, leaving other users' alone
+            rebuild_summaries(user_id=user_id, batch_size=batch_size)
+            for metric in ROLLUP_SOURCES:
+                rebuild_rollups(metric, user_id=user_id, batch_size=batch_size)
+    connection.close()
+    return written
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic users with meals (from real Food rows), water, steps "
+        "and activity history for load testing. Output is deterministic per --seed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--users-per-task", type=int, default=10)
+        parser.add_argument("--prefix", default="synthetic", help="Username/email prefix of the generated users.")
+        parser.add_argument("--password", default="synthetic-password",
+                            help="Password shared by every generated user (hashed once).")
+        parser.add_argument("--skip-aggregates", action="store_true",
+                            help="Don't build the generated users' nutrition summaries and rollups.")
+
+    def handle(self, *args, **options):
+        global _foods
+        _foods = list(Food.objects.all())
+        if not _foods:
+            raise CommandError("No foods found; load them first with: manage.py load_catalog food_data.json")
+
+        seed = options["seed"]
+        workers = max(1, options["workers"])
+        if connection.vendor == "sqlite" and workers > 1:
+            self.stdout.write("SQLite allows a single writer; using 1 worker.")
+            workers = 1
+
+        started = time.perf_counter()
+        user_rows = self._create_users(options)
+        self.stdout.write(f"Created {len(user_rows)} users in {time.perf_counter() - started:.1f}s")
+
+        start = now().date() - timedelta(days=options["days"] - 1)
+        step = options["users_per_task"]
+        tasks = [
+            (user_rows[i:i + step], seed, start, options["days"], options["batch_size"], not options["skip_aggregates"])
+            for i in range(0, len(user_rows), step)
+        ]
+
+        generated = time.perf_counter()
+        rows = 0
+        if workers == 1:
+            for written in map(_generate_users, tasks):
+                rows += written
+                self._report(rows, generated)
+        else:
+            # Forked workers must not share the parent's database connection
+            connections.close_all()
+            with multiprocessing.get_context("fork").Pool(workers) as pool:
+                for written in pool.imap_unordered(_generate_users, tasks):
+                    rows += written
+                    self._report(rows, generated)
+        elapsed = time.perf_counter() - generated
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {rows} history rows for {len(user_rows)} users in {elapsed:.1f}s "
+            f"({rows / elapsed if elapsed else 0:,.0f} rows/s, {workers} workers)."
+        ))
+
+    def _create_users(self, options):
+        """Bulk create the users; returns ``[(index, user_id), ...]``."""
+        prefix = f"{options['prefix']}{options['seed']}-"
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f"Users named {prefix}* already exist; pick another --seed or --prefix.")
+
+        password = make_password(options["password"])
+        users = []
+        for index in range(options["users"]):
+            profile = generate_profile(_user_rng(options["seed"], f"profile-{index}"))
+            users.append(User(
+                username=f"{prefix}{index}", email=f"{prefix}{index}@example.com",
+                password=password, **profile,
+            ))
+        User.objects.bulk_create(users, batch_size=options["batch_size"])
+        ids = dict(User.objects.filter(username__startswith=prefix).values_list("username", "id"))
+        return [(index, ids[f"{prefix}{index}"]) for index in range(options["users"])]
+
+    def _report(self, rows, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"  {rows} rows ({rows / elapsed if elapsed else 0:,.0f} rows/s)")
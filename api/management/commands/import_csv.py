@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from api.importing import KINDS, ImportFormatError, import_csv
+from api.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Import wearable CSV exports of steps (date, steps[, time]) or activities "
+        "(date, activity_type, duration_minutes[, time, calories_burned]) for one user."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+", help="CSV files to import.")
+        parser.add_argument("--user", required=True, help="Username or email of the user.")
+        parser.add_argument("--kind", required=True, choices=list(KINDS))
+        parser.add_argument("--show-errors", type=int, default=10, help="Rejected rows to list per file.")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(Q(username=options["user"]) | Q(email=options["user"])).first()
+        if user is None:
+            raise CommandError(f"No user {options['user']!r}.")
+
+        for path in options["files"]:
+            try:
+                with open(path, "rb") as file:
+                    report = import_csv(user.pk, options["kind"], file)
+            except (OSError, ImportFormatError) as exc:
+                raise CommandError(f"{path}: {exc}")
+            self.stdout.write(
+                f"{path}: {report['rows']} rows in {report['seconds']:.2f}s ({report['rows_per_second']} rows/s): "
+                f"{report['imported']} imported, {report['duplicates']} duplicates, {report['rejected']} rejected"
+            )
+            for error in report["errors"][:options["show_errors"]]:
+                self.stdout.write(f"  line {error['line']}: {error['error']}")
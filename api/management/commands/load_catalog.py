@@ -0,0 +1,137 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from api.catalog import FOOD_CATALOG, bump_catalog_version
+from api.models import Food, Tip
+
+FOOD_FIELDS = [
+    "energy_kcal", "protein", "fat", "carbohydrates", "fiber", "calcium",
+    "iron", "magnesium", "portion_small", "portion_medium", "portion_large",
+]
+
+
+def iter_json_records(stream, chunk_size=1 << 16):
+    """Yield the objects of a top-level JSON array (or NDJSON) one at a time.
+
+    Only the current chunk and the object being decoded are held in memory,
+    so arbitrarily large catalog files can be loaded.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    while True:
+        # Skip the array brackets, separators and whitespace between objects
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,[]":
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                return
+            buffer, pos = stream.read(chunk_size), 0
+            eof = not buffer
+            continue
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # The object straddles the chunk boundary; read more and retry
+            more = stream.read(chunk_size)
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+        yield record
+        pos = end
+
+
+def fixture_fields(record):
+    """Accept both ``loaddata`` fixture entries and plain objects."""
+    return record.get("fields", record)
+
+
+class Command(BaseCommand):
+    help = "Stream a large food or tip catalog (JSON array or NDJSON) into the database in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Catalog file, e.g. food_data.json or tips.json.")
+        parser.add_argument("--kind", choices=["food", "tip"], default="food")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        load_batch = self._load_foods if options["kind"] == "food" else self._load_tips
+        batch_size = options["batch_size"]
+
+        started = time.perf_counter()
+        rows = written = self.skipped = 0
+        batch = []
+        try:
+            with open(options["path"], encoding="utf-8") as stream:
+                for record in iter_json_records(stream):
+                    batch.append(fixture_fields(record))
+                    if len(batch) >= batch_size:
+                        written += load_batch(batch)
+                        rows += len(batch)
+                        batch = []
+                        self._report(rows, started)
+                if batch:
+                    written += load_batch(batch)
+                    rows += len(batch)
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f"Could not load {options['path']}: {exc!r}")
+
+        if options["kind"] == "food" and written:
+            # bulk_create skips post_save, so invalidate cached catalog renderings here
+            bump_catalog_version(FOOD_CATALOG)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {rows} {options['kind']} records ({written} written, {self.skipped} skipped) "
+            f"in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.0f} rows/s)."
+        ))
+
+    def _report(self, rows, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"  {rows} rows ({rows / elapsed if elapsed else 0:.0f} rows/s)")
+
+    def _load_foods(self, batch):
+        # Last occurrence wins if a name repeats inside one batch
+        records = {fields["name"]: fields for fields in batch}
+        with transaction.atomic():
+            # Start from the stored values so a column missing from a record
+            # keeps its current value instead of being overwritten
+            stored = Food.objects.in_bulk(list(records), field_name="name")
+            foods = []
+            for name, fields in records.items():
+                values = {field: getattr(stored[name], field) for field in FOOD_FIELDS} if name in stored else {}
+                values.update((field, fields[field]) for field in FOOD_FIELDS if field in fields)
+                foods.append(Food(name=name, **values))
+            return self._write_foods(foods)
+
+    def _write_foods(self, foods):
+        try:
+            with transaction.atomic():
+                Food.objects.bulk_create(
+                    foods,
+                    update_conflicts=True,
+                    unique_fields=["name"],
+                    update_fields=FOOD_FIELDS,
+                )
+            return len(foods)
+        except (IntegrityError, ValueError, TypeError) as exc:
+            if len(foods) == 1:
+                self.skipped += 1
+                self.stderr.write(f"  Skipped food {foods[0].name!r}: {exc}")
+                return 0
+        # Retry one at a time so only the bad records are skipped
+        return sum(self._write_foods([food]) for food in foods)
+
+    def _load_tips(self, batch):
+        # Tips have no natural key, so skip any whose text is already stored
+        contents = list(dict.fromkeys(fields.get("content") or fields["text"] for fields in batch))
+        existing = set(Tip.objects.filter(content__in=contents).values_list("content", flat=True))
+        new_tips = [Tip(content=content) for content in contents if content not in existing]
+        Tip.objects.bulk_create(new_tips)
+        return len(new_tips)
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import random
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils.timezone import now
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import Food, User
+
+
+def build_scenarios(food_id):
+    """(label, method, path, body) requests each simulated client cycles through."""
+    today = now().date()
+    month_start = today.replace(day=1)
+    return [
+        ("log_water", "POST", "/api/water/log/", {"amount": 0.25}),
+        ("log_steps", "POST", "/api/steps/log/", {"steps": 500}),
+        ("log_activity", "POST", "/api/activity/log/", {"activity_type": "walking", "duration_minutes": 20}),
+        ("log_meal", "POST", "/api/meal/log/", {"food_id": food_id, "portion_size": "medium"}),
+        ("water_history", "GET", f"/api/water/history/?date={today}", None),
+        ("steps_history", "GET", "/api/steps/history/", None),
+        ("activity_history", "GET", "/api/activity/history/", None),
+        ("rollup_history", "GET", f"/api/history/steps/rollup/?start_date={month_start}&end_date={today}", None),
+    ]
+
+
+def encode_request(method, path, body, host, token):
+    payload = json.dumps(body).encode() if body is not None else b""
+    head = (
+        f"{method} {path} HTTP/1.1\r\n"
+        f"Host: {host}\r\n"
+        f"Authorization: Bearer {token}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        "Connection: close\r\n\r\n"
+    ).encode()
+    return head + payload
+
+
+async def send_request(address, raw, client_delay):
+    """Send one request like a slow mobile client and return its status code.
+
+    The request is written in two halves ``client_delay`` seconds apart, so
+    a server that has accepted the connection has to wait on the client.
+    """
+    reader, writer = await asyncio.open_connection(*address)
+    try:
+        half = len(raw) // 2
+        writer.write(raw[:half])
+        await writer.drain()
+        if client_delay:
+            await asyncio.sleep(client_delay)
+        writer.write(raw[half:])
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    return int(response.split(b" ", 2)[1]) if response.startswith(b"HTTP/") else 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the logging and history endpoints of a running server with many "
+        "concurrent slow clients. Run it against the WSGI and the ASGI deployment to compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", help="Base URL of the server, e.g. http://127.0.0.1:8000")
+        parser.add_argument("--user", required=True, help="Username or email of the user to log in as.")
+        parser.add_argument("--concurrency", type=int, default=50, help="Simultaneous clients.")
+        parser.add_argument("--duration", type=float, default=20.0, help="Seconds to keep sending requests.")
+        parser.add_argument("--client-delay", type=float, default=0.2,
+                            help="Seconds each client stalls mid-request, simulating a slow network.")
+        parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme != "http" or not url.hostname:
+            raise CommandError("Only plain http:// URLs are supported.")
+        user = User.objects.filter(Q(username=options["user"]) | Q(email=options["user"])).first()
+        if user is None:
+            raise CommandError(f"No user {options['user']!r}.")
+        food_id = Food.objects.order_by("id").values_list("id", flat=True).first()
+        if food_id is None:
+            raise CommandError("No foods found; load them first with: manage.py load_catalog food_data.json")
+
+        host = url.netloc
+        token = str(AccessToken.for_user(user))
+        requests = [
+            (label, encode_request(method, path, body, host, token))
+            for label, method, path, body in build_scenarios(food_id)
+        ]
+        address = (url.hostname, url.port or 80)
+        results = asyncio.run(self._run(address, requests, options))
+        self._report(results, options)
+
+    async def _run(self, address, requests, options):
+        results = []
+        deadline = time.perf_counter() + options["duration"]
+        rng = random.Random(options["seed"])
+
+        async def client(offset):
+            # Stagger the clients and jitter their stalls; clients stalling in
+            # lockstep would let the kernel's accept backlog hide the delays
+            delay = options["client_delay"]
+            await asyncio.sleep(rng.uniform(0, delay))
+            index = offset
+            while time.perf_counter() < deadline:
+                label, raw = requests[index % len(requests)]
+                index += 1
+                started = time.perf_counter()
+                try:
+                    status = await asyncio.wait_for(
+                        send_request(address, raw, rng.uniform(0.5, 1.5) * delay), options["timeout"],
+                    )
+                except (OSError, asyncio.TimeoutError):
+                    status = 0
+                results.append((label, status, time.perf_counter() - started))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(rng.randrange(len(requests))) for _ in range(options["concurrency"])))
+        self._elapsed = time.perf_counter() - started
+        return results
+
+    def _report(self, results, options):
+        if not results:
+            raise CommandError("No requests completed.")
+        ok = [latency for _, status, latency in results if 200 <= status < 300]
+        failed = len(results) - len(ok)
+        self.stdout.write(
+            f"{len(results)} requests in {self._elapsed:.1f}s from {options['concurrency']} clients "
+            f"({options['client_delay'] * 1000:.0f} ms client delay): "
+            f"{len(ok) / self._elapsed:.1f} ok req/s, {failed} failed"
+        )
+        if len(ok) > 1:
+            cuts = statistics.quantiles(ok, n=100, method="inclusive")
+            self.stdout.write(
+                f"latency p50 {cuts[49] * 1000:.0f} ms, p95 {cuts[94] * 1000:.0f} ms, "
+                f"p99 {cuts[98] * 1000:.0f} ms, max {max(ok) * 1000:.0f} ms"
+            )
+        for label in dict.fromkeys(label for label, _, _ in results):
+            latencies = [latency for name, status, latency in results if name == label and 200 <= status < 300]
+            errors = sum(1 for name, status, _ in results if name == label and not 200 <= status < 300)
+            median = statistics.median(latencies) * 1000 if latencies else 0
+            self.stdout.write(f"  {label:18s} {len(latencies):6d} ok {errors:5d} failed  p50 {median:7.0f} ms")
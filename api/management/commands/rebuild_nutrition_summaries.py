@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import DailyNutritionSummary, Meal
+from api.nutrition import SUMMARY_FIELDS, rebuild_summaries, summarize_meals
+
+
+class Command(BaseCommand):
+    help = "Rebuild (or verify) DailyNutritionSummary rows from the raw Meal table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only process this user id.")
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Compare the stored summaries with the raw meals without writing anything.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not options["verify"]:
+            written, replaced = rebuild_summaries(user_id=options["user"], batch_size=options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} daily summaries (replaced {replaced})."))
+            return
+
+        meals = Meal.objects.all()
+        summaries = DailyNutritionSummary.objects.all()
+        if options["user"]:
+            meals = meals.filter(user_id=options["user"])
+            summaries = summaries.filter(user_id=options["user"])
+        expected = {
+            (row["user_id"], row["day"]): row
+            for row in summarize_meals(meals).iterator()
+        }
+        self._verify(expected, summaries)
+
+    def _verify(self, expected, summaries):
+        mismatches = 0
+        seen = set()
+        for summary in summaries.iterator():
+            key = (summary.user_id, summary.date)
+            seen.add(key)
+            row = expected.get(key)
+            if row is None:
+                if summary.meal_count:
+                    mismatches += 1
+                    self.stdout.write(f"Stale summary for user {key[0]} on {key[1]}")
+                continue
+            if summary.meal_count != row["meal_count"] or any(
+                abs(getattr(summary, total) - row[total]) > 1e-6 for total in SUMMARY_FIELDS
+            ):
+                mismatches += 1
+                self.stdout.write(f"Mismatched summary for user {key[0]} on {key[1]}")
+
+        for key in expected.keys() - seen:
+            mismatches += 1
+            self.stdout.write(f"Missing summary for user {key[0]} on {key[1]}")
+
+        if mismatches:
+            raise CommandError(f"{mismatches} daily summaries are out of date; run without --verify to rebuild.")
+        self.stdout.write(self.style.SUCCESS(f"All {len(expected)} daily summaries match the raw meals."))
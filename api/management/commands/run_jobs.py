@@ -0,0 +1,77 @@
+import os
+import signal
+import socket
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api import jobs
+from api.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (password reset emails, ...) until stopped. "
+        "Start as many workers as needed; they never claim the same job."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=4, help="Jobs run at once.")
+        parser.add_argument("--processes", action="store_true",
+                            help="Run jobs in a process pool instead of threads, for CPU-bound handlers.")
+        parser.add_argument("--batch-size", type=int, default=50, help="Jobs claimed per round.")
+        parser.add_argument("--poll-interval", type=float, default=1.0,
+                            help="Seconds to wait before looking again when no job is due.")
+        parser.add_argument("--once", action="store_true", help="Exit once no job is due instead of polling.")
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--concurrency and --batch-size must be positive.")
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        stopping = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stopping.set())
+
+        if options["processes"]:
+            # Forked children must not share the parent's database connection
+            connections.close_all()
+            pool = ProcessPoolExecutor(options["concurrency"], initializer=django.setup)
+        else:
+            pool = ThreadPoolExecutor(options["concurrency"], thread_name_prefix="job")
+
+        self.stdout.write(f"Worker {worker} running jobs ({options['concurrency']} at once)")
+        totals = defaultdict(int)
+        with pool:
+            while not stopping.is_set():
+                claimed = jobs.claim(worker, options["batch_size"])
+                if not claimed:
+                    if options["once"]:
+                        break
+                    stopping.wait(options["poll_interval"])
+                    continue
+                for status in self._run_round(pool, claimed):
+                    totals[status] += 1
+        self.stdout.write(
+            f"Stopped: {totals[None]} done, {totals[Job.QUEUED]} to retry, {totals[Job.FAILED]} failed"
+        )
+
+    def _run_round(self, pool, claimed):
+        """Run the claimed jobs, with each batched kind in a single call, and record the results."""
+        groups = defaultdict(list)
+        for job in claimed:
+            groups[job.kind if jobs.is_batched(job.kind) else job.pk].append(job)
+        futures = {
+            pool.submit(jobs.execute, group[0].kind, [job.payload for job in group]): group
+            for group in groups.values()
+        }
+        for future in as_completed(futures):
+            for job, error in zip(futures[future], future.result()):
+                status = jobs.finish(job, error)
+                if error:
+                    outcome = "giving up" if status == Job.FAILED else "will retry"
+                    self.stderr.write(f"{job.kind} #{job.pk} attempt {job.attempts}/{job.max_attempts} failed, {outcome}:\n{error}")
+                yield status
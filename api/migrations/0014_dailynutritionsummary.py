@@ -0,0 +1,54 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def backfill_summaries(apps, schema_editor):
+    Meal = apps.get_model('api', 'Meal')
+    DailyNutritionSummary = apps.get_model('api', 'DailyNutritionSummary')
+    rows = (Meal.objects
+            .annotate(day=TruncDate('timestamp'))
+            .values('user_id', 'day')
+            .annotate(
+                meal_count=Count('id'),
+                total_calories=Coalesce(Sum('calories'), Value(0.0)),
+                total_protein=Coalesce(Sum('protein'), Value(0.0)),
+                total_carbohydrates=Coalesce(Sum('carbohydrates'), Value(0.0)),
+                total_fat=Coalesce(Sum('fat'), Value(0.0)),
+            )
+            .order_by())
+    DailyNutritionSummary.objects.bulk_create(
+        (DailyNutritionSummary(date=row.pop('day'), **row) for row in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_alter_user_target_daily_calories'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyNutritionSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('meal_count', models.IntegerField(default=0)),
+                ('total_calories', models.FloatField(default=0)),
+                ('total_protein', models.FloatField(default=0)),
+                ('total_carbohydrates', models.FloatField(default=0)),
+                ('total_fat', models.FloatField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nutrition_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'date'), name='unique_daily_nutrition_summary')],
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_catalogversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='metrics_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
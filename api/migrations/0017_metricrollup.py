@@ -0,0 +1,54 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+# metric -> (source model, date field, summed value field), as in api.rollups
+ROLLUP_SOURCES = {
+    'steps': ('StepLog', 'date', 'steps'),
+    'activity_minutes': ('ActivityLog', 'date', 'duration_minutes'),
+    'water': ('WaterLog', 'date_logged', 'amount'),
+}
+
+
+def backfill_rollups(apps, schema_editor):
+    MetricRollup = apps.get_model('api', 'MetricRollup')
+    for metric, (model_name, date_field, value_field) in ROLLUP_SOURCES.items():
+        model = apps.get_model('api', model_name)
+        rows = (model.objects
+                .values('user_id', date_field)
+                .annotate(total=Sum(value_field), count=Count('id'))
+                .order_by())
+        MetricRollup.objects.bulk_create(
+            (MetricRollup(user_id=row['user_id'], metric=metric, date=row[date_field],
+                          total=row['total'] or 0, count=row['count'])
+             for row in rows.iterator()),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_user_metrics_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=30)),
+                ('date', models.DateField()),
+                ('total', models.FloatField(default=0)),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'metric', 'date'), name='unique_metric_rollup')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
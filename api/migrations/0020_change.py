@@ -0,0 +1,53 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+# sync record type -> source model, as in api.changes
+SOURCES = {'meal': 'Meal', 'water': 'WaterLog', 'steps': 'StepLog', 'activity': 'ActivityLog'}
+
+
+def backfill_changes(apps, schema_editor):
+    # Existing entries count as created, so a first sync (since=0) returns them
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    Change = apps.get_model('api', 'Change')
+    columns = ', '.join(quote(Change._meta.get_field(name).column)
+                        for name in ('user', 'kind', 'object_id', 'deleted', 'created_at'))
+    created_at = Change._meta.get_field('created_at').get_db_prep_save(timezone.now(), connection)
+    deleted = Change._meta.get_field('deleted').get_db_prep_save(False, connection)
+    with connection.cursor() as cursor:
+        for kind, model_name in SOURCES.items():
+            table = apps.get_model('api', model_name)._meta.db_table
+            cursor.execute(
+                f'INSERT INTO {quote(Change._meta.db_table)} ({columns}) '
+                f'SELECT user_id, %s, id, %s, %s FROM {quote(table)} ORDER BY id',
+                [kind, deleted, created_at],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_user_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'id'], name='change_user_cursor')],
+            },
+        ),
+        migrations.RunPython(backfill_changes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_change'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['user', 'date', 'time'], name='activitylog_user_date'),
+        ),
+        migrations.AddIndex(
+            model_name='steplog',
+            index=models.Index(fields=['user', 'date', 'time'], name='steplog_user_date'),
+        ),
+        migrations.AddIndex(
+            model_name='waterlog',
+            index=models.Index(fields=['user', 'date_logged'], name='waterlog_user_date'),
+        ),
+    ]
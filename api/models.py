@@ -21,6 +21,8 @@ class User(AbstractUser):
         null=True,
         blank=True,
         validators=[FileExtensionValidator(['jpg', 'jpeg', 'png'])])
+    # Resized copies of ``image`` as {size: {format: storage name}}, written by api.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     email = models.EmailField(unique=True)  # This ensures email is unique in the database
     daily_water_goal = models.FloatField(null=True, blank=True)  # liters
@@ -28,11 +30,24 @@ class User(AbstractUser):
     weight_goal = models.FloatField(null=True, blank=True)  # kg
     target_daily_calories = models.IntegerField(null=True, blank=True)
     daily_steps_goal = models.IntegerField(null=True, blank=True)  # steps
+    # Bumped whenever anything feeding the health metrics changes (see health.cache)
+    metrics_version = models.PositiveIntegerField(default=0, editable=False)
     # Set email as the primary login field
     USERNAME_FIELD = 'email'
     # Optionally define required fields for creating a user via the admin or CLI
     REQUIRED_FIELDS = ['username']  # username is still needed, but won't be used for login
 
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Load every deferred field on first access instead of one query per
+        # field. Users built for token authentication (api.authentication)
+        # defer the columns the user cache leaves out.
+        if fields is not None:
+            fields = set(fields)
+            deferred = self.get_deferred_fields()
+            if fields & deferred:
+                fields |= deferred
+        super().refresh_from_db(using, fields, from_queryset)
+
 User = get_user_model()
 
 class Food(models.Model):
@@ -52,6 +67,14 @@ class Food(models.Model):
     def __str__(self):
         return self.name
 
+class CatalogVersion(models.Model):
+    """Change counter for a reference catalog, bumped whenever its rows change."""
+    name = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
 class Meal(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="meals")
     food = models.ForeignKey(Food, on_delete=models.CASCADE, null=True, blank=True)  # Food item
@@ -65,6 +88,24 @@ class Meal(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.food.name} ({self.portion_size})"
 
+class DailyNutritionSummary(models.Model):
+    """Running per-user, per-day nutrient totals kept in step with Meal writes."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="nutrition_summaries")
+    date = models.DateField()
+    meal_count = models.IntegerField(default=0)
+    total_calories = models.FloatField(default=0)
+    total_protein = models.FloatField(default=0)
+    total_carbohydrates = models.FloatField(default=0)
+    total_fat = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "date"], name="unique_daily_nutrition_summary"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.date}: {self.total_calories} kcal"
+
 # class Meal(models.Model):
 #     user = models.ForeignKey(User, on_delete=models.CASCADE)
 #     name = models.CharField(max_length=100)
@@ -96,6 +137,10 @@ class ActivityLog(models.Model):
     date = models.DateField(auto_now_add=True)
     time = models.TimeField(auto_now_add=True)  # NEW
 
+    class Meta:
+        # Per-day lookups (dashboard) and newest-first history pages
+        indexes = [models.Index(fields=["user", "date", "time"], name="activitylog_user_date")]
+
     def __str__(self):
         return f"{self.user.email} - {self.activity_type} on {self.date} at {self.time}"
 
@@ -105,6 +150,10 @@ class StepLog(models.Model):
     date = models.DateField(auto_now_add=True)
     time = models.TimeField(auto_now_add=True)  # NEW
 
+    class Meta:
+        # Per-day lookups (dashboard) and newest-first history pages
+        indexes = [models.Index(fields=["user", "date", "time"], name="steplog_user_date")]
+
     def __str__(self):
         return f"{self.user.email} - {self.steps} steps on {self.date} at {self.time}"
 
@@ -115,6 +164,9 @@ class WaterLog(models.Model):
     timestamp = models.DateTimeField(default=timezone.now)
     date_logged = models.DateField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["user", "date_logged"], name="waterlog_user_date")]
+
 
 
 
@@ -123,4 +175,69 @@ class Tip(models.Model):
 
     def __str__(self):
         return self.content[:50]  # Short preview
-    
+
+
+class MetricRollup(models.Model):
+    """Per-user total of one logged metric over a day."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="rollups")
+    metric = models.CharField(max_length=30)  # key of api.rollups.ROLLUP_SOURCES
+    date = models.DateField()
+    total = models.FloatField(default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "metric", "date"], name="unique_metric_rollup"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.metric} {self.date}: {self.total}"
+
+
+
+class Change(models.Model):
+    """A create, update or delete of one of a user's log entries (see api.changes).
+
+    The id is the sync cursor: clients fetch the changes after the last one they saw.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="changes")
+    kind = models.CharField(max_length=20)  # key of api.changes.MODELS
+    object_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)  # tombstone
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "id"], name="change_user_cursor"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} #{self.pk}: {self.kind} {self.object_id}{' deleted' if self.deleted else ''}"
+
+
+class Job(models.Model):
+    """Background work waiting for ``manage.py run_jobs`` (see api.jobs).
+
+    Rows are deleted once their job succeeds; jobs out of attempts stay as "failed".
+    """
+    QUEUED, RUNNING, FAILED = "queued", "running", "failed"
+    STATUS_CHOICES = [(QUEUED, "Queued"), (RUNNING, "Running"), (FAILED, "Failed")]
+
+    kind = models.CharField(max_length=50)  # name registered with api.jobs.handler
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)  # not claimed before this time
+    locked_by = models.CharField(max_length=100, blank=True)  # "host:pid" of the claiming worker
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_at"], name="job_status_run_at"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status}, attempt {self.attempts}/{self.max_attempts})"
@@ -0,0 +1,143 @@
+# nutrition.py - Nutrient maths: portion scaling and daily summaries kept in step with Meal writes (see signals.py)
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import DailyNutritionSummary, Meal
+from .upserts import increment
+
+SUMMARY_FIELDS = {
+    "total_calories": "calories",
+    "total_protein": "protein",
+    "total_carbohydrates": "carbohydrates",
+    "total_fat": "fat",
+}
+
+# Per-100 g Food columns the plate calculator scales, in output order
+PLATE_NUTRIENTS = [
+    "energy_kcal", "protein", "fat", "carbohydrates",
+    "fiber", "calcium", "iron", "magnesium",
+]
+
+
+def meal_date(meal):
+    """Day a meal counts towards, matching timestamp__date lookups."""
+    return timezone.localdate(meal.timestamp)
+
+
+def meal_totals(meal):
+    """``(user_id, day, {summary field: value})`` a meal contributes to the summaries."""
+    return meal.user_id, meal_date(meal), {
+        total: getattr(meal, field) or 0 for total, field in SUMMARY_FIELDS.items()
+    }
+
+
+def apply_meal(meal, sign=1):
+    """Add (sign=1) or remove (sign=-1) a meal's nutrients from its day's summary.
+
+    Meal saves and deletes do this through signals.py; callers should run
+    the write in a transaction.
+    """
+    user_id, date, totals = meal_totals(meal)
+    apply_delta(user_id, date, sign, {total: sign * value for total, value in totals.items()})
+
+
+def apply_meals(meals):
+    """Add a batch of new meals to their summaries, one update per day touched.
+
+    For bulk_create, which sends no signals.
+    """
+    grouped = {}
+    for meal in meals:
+        count, deltas = grouped.get((meal.user_id, meal_date(meal)), (0, dict.fromkeys(SUMMARY_FIELDS, 0)))
+        for total, field in SUMMARY_FIELDS.items():
+            deltas[total] += getattr(meal, field) or 0
+        grouped[(meal.user_id, meal_date(meal))] = (count + 1, deltas)
+
+    for (user_id, date), (count, deltas) in grouped.items():
+        apply_delta(user_id, date, count, deltas)
+
+
+def apply_delta(user_id, date, count, deltas):
+    """Add ``count`` meals and the ``deltas`` totals to a day's summary."""
+    increment(DailyNutritionSummary, {"user_id": user_id, "date": date},
+              {"meal_count": count, **{total: deltas[total] for total in SUMMARY_FIELDS}})
+
+
+def summarize_meals(meals=None):
+    """Aggregate raw meals into one row of totals per (user, date)."""
+    meals = Meal.objects.all() if meals is None else meals
+    return (meals
+            .annotate(day=TruncDate("timestamp"))
+            .values("user_id", "day")
+            .annotate(
+                meal_count=Count("id"),
+                **{total: Coalesce(Sum(field), Value(0.0)) for total, field in SUMMARY_FIELDS.items()},
+            )
+            .order_by("user_id", "day"))
+
+
+def rebuild_summaries(user_id=None, batch_size=1000):
+    """Replace the stored daily summaries with ones recomputed from the raw meals.
+
+    Returns ``(written, replaced)`` row counts.
+    """
+    meals = Meal.objects.all()
+    summaries = DailyNutritionSummary.objects.all()
+    if user_id is not None:
+        meals = meals.filter(user_id=user_id)
+        summaries = summaries.filter(user_id=user_id)
+
+    with transaction.atomic():
+        replaced, _ = summaries.delete()
+        rows = DailyNutritionSummary.objects.bulk_create(
+            (
+                DailyNutritionSummary(
+                    user_id=row["user_id"],
+                    date=row["day"],
+                    meal_count=row["meal_count"],
+                    **{total: row[total] for total in SUMMARY_FIELDS},
+                )
+                for row in summarize_meals(meals).iterator()
+            ),
+            batch_size=batch_size,
+        )
+    return len(rows), replaced
+
+
+def get_daily_totals(user, date):
+    """Return the summary totals for one day, or zeros if nothing was logged."""
+    summary = (DailyNutritionSummary.objects
+               .filter(user=user, date=date)
+               .values(*SUMMARY_FIELDS)
+               .first())
+    return summary or {total: 0 for total in SUMMARY_FIELDS}
+
+
+def portion_factor(food, portion_size=None, grams=None):
+    """Multiplier applied to a food's per-100 g values for a portion or weight."""
+    if grams is not None:
+        return grams / 100
+    portion = {
+        "small": food.portion_small,
+        "medium": food.portion_medium,
+        "large": food.portion_large,
+    }.get(portion_size)
+    return portion / 100 if portion else 1
+
+
+def calculate_nutrients(foods, factors):
+    """Scale every food's nutrients by its factor in one vectorized step.
+
+    Returns the per-item matrix (one row per food, one column per entry of
+    PLATE_NUTRIENTS, NaN where the food has no value) and the column totals.
+    """
+    values = np.array(
+        [[getattr(food, nutrient) for nutrient in PLATE_NUTRIENTS] for food in foods],
+        dtype=float,
+    ).reshape(len(foods), len(PLATE_NUTRIENTS))
+    per_item = values * np.asarray(factors, dtype=float)[:, np.newaxis]
+    return per_item, np.nansum(per_item, axis=0)
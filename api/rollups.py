@@ -0,0 +1,118 @@
+# rollups.py - Daily per-user totals of the logged metrics
+#
+# Only day rows are stored: every write adds to its day's row in a single
+# upsert (see signals.py), and weekly and monthly totals are summed from
+# the day rows when read. Past days can be recomputed from the raw logs
+# with the compact_rollups command.
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import Trunc
+
+from .models import ActivityLog, MetricRollup, StepLog, WaterLog
+from .upserts import increment
+
+# metric -> (source model, date field, summed value field). Meal calories
+# are in DailyNutritionSummary (api.nutrition).
+ROLLUP_SOURCES = {
+    "steps": (StepLog, "date", "steps"),
+    "activity_minutes": (ActivityLog, "date", "duration_minutes"),
+    "water": (WaterLog, "date_logged", "amount"),
+}
+SOURCE_METRICS = {model: metric for metric, (model, _, _) in ROLLUP_SOURCES.items()}
+PERIODS = ("day", "week", "month")
+
+
+def period_start(day, period):
+    """First day of the day/week/month containing ``day``."""
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_period_start(day, period):
+    """First day of the day/week/month after the one containing ``day``."""
+    if period == "week":
+        return period_start(day, period) + timedelta(days=7)
+    if period == "month":
+        return (day.replace(day=1) + timedelta(days=31)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def rollup_values(instance):
+    """``(metric, day, value)`` an instance of a source model contributes."""
+    metric = SOURCE_METRICS[type(instance)]
+    _, date_field, value_field = ROLLUP_SOURCES[metric]
+    return metric, getattr(instance, date_field), getattr(instance, value_field) or 0
+
+
+def record(user_id, metric, day, value, count=1):
+    """Add ``value`` (and ``count`` entries) to the day's rollup."""
+    increment(MetricRollup, {"user_id": user_id, "metric": metric, "date": day}, {"total": value, "count": count})
+
+
+def period_totals(user_id, metric, period, start_date, end_date):
+    """Totals of ``metric`` for each day/week/month overlapping ``[start_date, end_date]``.
+
+    Weeks and months are whole, including days outside the range. Returns
+    ``period_start``/``total``/``count`` dicts in date order.
+    """
+    rows = MetricRollup.objects.filter(
+        user_id=user_id, metric=metric,
+        date__gte=period_start(start_date, period), date__lt=next_period_start(end_date, period),
+    )
+    bucket = F("date") if period == "day" else Trunc("date", period, output_field=DateField())
+    return (rows
+            .annotate(period_start=bucket)
+            .values("period_start")
+            .annotate(period_total=Sum("total"), period_count=Sum("count"))
+            .order_by("period_start")
+            .values("period_start", total=F("period_total"), count=F("period_count")))
+
+
+def aggregate_rollups(metric, queryset=None):
+    """Recompute day rollup rows for ``metric`` straight from the raw logs."""
+    model, date_field, value_field = ROLLUP_SOURCES[metric]
+    queryset = model.objects.all() if queryset is None else queryset
+    return (queryset
+            .values("user_id", date_field)
+            .annotate(total=Sum(value_field), count=Count("id"))
+            .order_by("user_id", date_field))
+
+
+def rebuild_rollups(metric, user_id=None, since=None, before=None, batch_size=1000):
+    """Replace stored rollups for days in ``[since, before)``.
+
+    Returns the number of rows written.
+    """
+    model, date_field, _ = ROLLUP_SOURCES[metric]
+
+    source = model.objects.all()
+    rollups = MetricRollup.objects.filter(metric=metric)
+    if user_id is not None:
+        source = source.filter(user_id=user_id)
+        rollups = rollups.filter(user_id=user_id)
+    if since is not None:
+        source = source.filter(**{f"{date_field}__gte": since})
+        rollups = rollups.filter(date__gte=since)
+    if before is not None:
+        source = source.filter(**{f"{date_field}__lt": before})
+        rollups = rollups.filter(date__lt=before)
+
+    with transaction.atomic():
+        rollups.delete()
+        rows = MetricRollup.objects.bulk_create(
+            (
+                MetricRollup(
+                    user_id=row["user_id"], metric=metric, date=row[date_field],
+                    total=row["total"] or 0, count=row["count"],
+                )
+                for row in aggregate_rollups(metric, source).iterator()
+            ),
+            batch_size=batch_size,
+        )
+    return len(rows)
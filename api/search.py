@@ -0,0 +1,128 @@
+# search.py - In-process, accent-insensitive search index over food names
+
+import heapq
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from itertools import accumulate, chain
+
+from .catalog import FOOD_CATALOG, get_catalog_version
+from .models import Food
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text):
+    """Fold accents and case so "Béinré" and "beinre" compare equal."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize(text))
+
+
+class FoodSearchIndex:
+    """Inverted index from normalized name tokens to foods.
+
+    Prefix lookups walk a sorted vocabulary with bisect, which behaves like a
+    trie over the tokens without one Python object per node. Foods are
+    numbered by a static rank (shorter names first) and every posting list is
+    kept in that order, so broad prefixes like "s" can be streamed lazily and
+    cut off once enough candidates have been seen.
+    """
+
+    # Candidates gathered per requested result before the final re-rank
+    POOL_FACTOR = 10
+
+    def __init__(self, foods, version=None):
+        self.version = version
+        docs = [(food_id, name, tokenize(name)) for food_id, name in foods]
+        docs.sort(key=lambda doc: (len(doc[2]), doc[0]))
+        self._ids = [doc[0] for doc in docs]
+        self._names = [doc[1] for doc in docs]
+        self._doc_tokens = [doc[2] for doc in docs]
+
+        postings = {}
+        for rank, tokens in enumerate(self._doc_tokens):
+            for token in dict.fromkeys(tokens):
+                postings.setdefault(token, []).append(rank)
+        self._vocab = sorted(postings)
+        self._postings = [postings[token] for token in self._vocab]
+        # Cumulative posting sizes give the document frequency of any prefix in O(1)
+        self._df = list(accumulate((len(ranks) for ranks in self._postings), initial=0))
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _span(self, prefix):
+        """Vocabulary slice holding the tokens that start with ``prefix``."""
+        start = bisect_left(self._vocab, prefix)
+        end = bisect_left(self._vocab, prefix + "\uffff", start)
+        return start, end
+
+    def _stream(self, prefix, start, end):
+        """Ranks of foods with a token starting with ``prefix``, exact hits first."""
+        if end - start == 1:
+            return iter(self._postings[start])
+        if self._vocab[start] == prefix:
+            return chain(self._postings[start], heapq.merge(*self._postings[start + 1:end]))
+        return heapq.merge(*self._postings[start:end])
+
+    def _score(self, rank, query_tokens):
+        """Exact token hits first, then earliest match, then shorter names."""
+        tokens = self._doc_tokens[rank]
+        exact = sum(1 for token in query_tokens if token in tokens)
+        first = next(
+            (i for i, token in enumerate(tokens) if token.startswith(query_tokens[0])),
+            len(tokens),
+        )
+        return (-exact, first, rank)
+
+    def search(self, query, limit=20):
+        """Return up to ``limit`` ``(id, name)`` pairs whose tokens match every
+        query token as a prefix."""
+        query_tokens = list(dict.fromkeys(tokenize(query)))
+        if not query_tokens:
+            return []
+
+        spans = {token: self._span(token) for token in query_tokens}
+        # Drive the lookup from the most selective token, verify the others per food
+        driver = min(query_tokens, key=lambda token: self._df[spans[token][1]] - self._df[spans[token][0]])
+        start, end = spans[driver]
+        if start == end:
+            return []
+        others = [token for token in query_tokens if token != driver]
+
+        pool = []
+        seen = set()
+        for rank in self._stream(driver, start, end):
+            if rank in seen:
+                continue
+            seen.add(rank)
+            tokens = self._doc_tokens[rank]
+            if all(any(token.startswith(other) for token in tokens) for other in others):
+                pool.append(rank)
+                if len(pool) >= limit * self.POOL_FACTOR:
+                    break
+
+        ranked = sorted(pool, key=lambda rank: self._score(rank, query_tokens))[:limit]
+        return [(self._ids[rank], self._names[rank]) for rank in ranked]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_food_index():
+    """Return the process-wide index, rebuilding it if the catalog changed."""
+    global _index
+    version = get_catalog_version(FOOD_CATALOG)
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = FoodSearchIndex(Food.objects.values_list("id", "name").iterator(), version=version)
+        return _index
@@ -0,0 +1,123 @@
+# seeding.py - Realistic synthetic history for benchmarks and load testing
+
+import random
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from .models import ActivityLog, Meal, StepLog, WaterLog
+from .nutrition import portion_factor
+
+ACTIVITY_TYPES = ["walking", "moderate", "vigorous", "running", "cycling", "yoga"]
+PORTIONS = ["small", "medium", "large"]
+# (earliest hour, latest hour) for each meal of the day
+MEAL_WINDOWS = [(6, 9), (12, 14), (18, 21)]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the values given for auto_now/auto_now_add fields.
+
+    Only meant for seeding scripts: it flips the flags on the shared field
+    objects, so it must not run alongside normal request handling.
+    """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _at(day, rng, start_hour, end_hour):
+    """A random aware datetime on ``day`` between the two hours (UTC), most
+    likely around the middle of the window."""
+    seconds = int(rng.triangular(start_hour * 3600, end_hour * 3600 - 1))
+    return datetime.combine(day, time(), tzinfo=dt_timezone.utc) + timedelta(seconds=seconds)
+
+
+def generate_profile(rng):
+    """Plausible User profile fields (metric units) for a synthetic user."""
+    gender = rng.choice(("male", "female"))
+    height = round(rng.gauss(1.76 if gender == "male" else 1.63, 0.07), 2)
+    weight = round(max(rng.gauss(25, 4), 16.5) * height * height, 1)
+    waist = round(weight * rng.uniform(0.95, 1.25) if gender == "male" else weight * rng.uniform(0.9, 1.2), 1)
+    return {
+        "gender": gender,
+        "age": rng.randint(18, 75),
+        "height": height,
+        "weight": weight,
+        "waist_circ": waist,
+        "hip_circ": round(waist / rng.uniform(0.78, 1.0), 1),
+        "goal": rng.choice(("lose weight", "maintain weight", "gain muscle")),
+        "activity_level": rng.choice(("low", "moderate", "high")),
+        "pref_diet": rng.choice(("none", "vegetarian", "vegan", "pescatarian")),
+        "daily_water_goal": rng.choice((2.0, 2.5, 3.0, 3.5)),
+        "daily_steps_goal": rng.choice((6000, 8000, 10000)),
+        "weekly_activity_goal": rng.randint(2, 6),
+        "weight_goal": round(weight * rng.uniform(0.85, 1.05), 1),
+        "target_daily_calories": rng.randrange(1600, 2900, 100),
+    }
+
+
+def generate_history(user_id, foods, start_date, days, rng=None):
+    """Build (unsaved) meals, water, step and activity rows for ``days`` days.
+
+    ``foods`` is a list of Food instances meals are drawn from. Returns a dict
+    mapping each model to its list of instances.
+    """
+    rng = rng or random.Random(user_id)
+    rows = {Meal: [], WaterLog: [], StepLog: [], ActivityLog: []}
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+
+        for start_hour, end_hour in MEAL_WINDOWS:
+            for _ in range(rng.choice((1, 1, 2))):
+                food = rng.choice(foods)
+                portion = rng.choice(PORTIONS)
+                factor = portion_factor(food, portion)
+                rows[Meal].append(Meal(
+                    user_id=user_id, food=food, portion_size=portion,
+                    calories=food.energy_kcal * factor, protein=food.protein * factor,
+                    fat=food.fat * factor, carbohydrates=food.carbohydrates * factor,
+                    timestamp=_at(day, rng, start_hour, end_hour),
+                ))
+
+        for _ in range(rng.randint(3, 8)):
+            rows[WaterLog].append(WaterLog(
+                user_id=user_id, amount=rng.choice((0.2, 0.25, 0.33, 0.5)),
+                timestamp=_at(day, rng, 7, 22), date_logged=day,
+            ))
+
+        for _ in range(rng.randint(1, 3)):
+            logged = _at(day, rng, 9, 23)
+            rows[StepLog].append(StepLog(
+                user_id=user_id, steps=rng.randint(800, 6000), date=day, time=logged.time(),
+            ))
+
+        if rng.random() < 0.6:
+            logged = _at(day, rng, 6, 21)
+            minutes = rng.randint(15, 75)
+            rows[ActivityLog].append(ActivityLog(
+                user_id=user_id, activity_type=rng.choice(ACTIVITY_TYPES), duration_minutes=minutes,
+                calories_burned=round(minutes * rng.uniform(4, 11), 1), date=day, time=logged.time(),
+            ))
+    return rows
+
+
+def bulk_insert(rows, batch_size=5000):
+    """Write the output of generate_history, keeping the generated timestamps.
+
+    bulk_create sends no signals, so callers should rebuild the daily
+    nutrition summaries and rollups afterwards and log the rows for sync
+    (api.changes.record_created_after).
+    """
+    with explicit_timestamps(*rows):
+        for model, instances in rows.items():
+            model.objects.bulk_create(instances, batch_size=batch_size)
+    return {model.__name__: len(instances) for model, instances in rows.items()}
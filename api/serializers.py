@@ -1,16 +1,44 @@
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.utils.encoding import smart_str, force_str, smart_bytes, DjangoUnicodeDecodeError
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
+from django.core.files.storage import default_storage
+from adrf import serializers as async_serializers
 from rest_framework import serializers
+from . import jobs
+from .fast_serializers import ValuesSerializer
 from .models import User, WaterLog, Meal, Progress, Activity, Food, Tip, ActivityLog, StepLog
 
+
+class ImageVariantsField(serializers.Field):
+    """URLs of the resized copies of a profile image as {size: {format: url}}.
+
+    Empty until the job worker has built them (see api.images).
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        urls = {}
+        for size, names in value.items():
+            urls[size] = {}
+            for fmt, name in names.items():
+                url = default_storage.url(name)
+                urls[size][fmt] = request.build_absolute_uri(url) if request is not None else url
+        return urls
+
+
 class UserSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = User
         fields = [
             'id', 'username', 'email', 'weight', 'height', 'age',
             'gender', 'pref_diet', 'waist_circ', 'hip_circ', 'goal',
-            'activity_level', 'image',
+            'activity_level', 'image', 'image_variants',
             'daily_water_goal', 'weekly_activity_goal', 'weight_goal', 'daily_steps_goal'
         ]
 
@@ -34,7 +62,24 @@ class CustomFoodSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("A food with this name already exists.")
         return value
     
-class WaterLogSerializer(serializers.ModelSerializer):
+class PlateItemSerializer(serializers.Serializer):
+    food_id = serializers.IntegerField()
+    portion_size = serializers.ChoiceField(choices=["small", "medium", "large"], required=False)
+    grams = serializers.FloatField(min_value=0, required=False)
+
+    def validate(self, data):
+        if ("portion_size" in data) == ("grams" in data):
+            raise serializers.ValidationError("Provide either 'portion_size' or 'grams'.")
+        return data
+
+class PlateSerializer(serializers.Serializer):
+    items = PlateItemSerializer(many=True, allow_empty=False, max_length=100)
+    
+class MealLogItemSerializer(serializers.Serializer):
+    food_id = serializers.IntegerField()
+    portion_size = serializers.ChoiceField(choices=["small", "medium", "large"], required=False, allow_null=True)
+
+class WaterLogSerializer(async_serializers.ModelSerializer):
     class Meta:
         model = WaterLog
         fields = ['amount', 'date_logged']
@@ -88,6 +133,8 @@ class RegisterSerializer(serializers.ModelSerializer):
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = User
         fields = [
@@ -107,14 +154,17 @@ class UserProfileSerializer(serializers.ModelSerializer):
             "weight_goal",
             "target_daily_calories",
             "daily_steps_goal",
-            "image"
+            "image",
+            "image_variants",
         ]
 
     
 class UserProfileUpdateSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = User
-        fields = ['username', 'age', 'weight', 'height', 'gender', 'pref_diet', 'waist_circ', 'hip_circ', 'goal', 'image',
+        fields = ['username', 'age', 'weight', 'height', 'gender', 'pref_diet', 'waist_circ', 'hip_circ', 'goal', 'image', 'image_variants',
                   'daily_water_goal', 'weekly_activity_goal', 'target_daily_calories', 'weight_goal', 'daily_steps_goal'  # NEW
         ]
 
@@ -137,7 +187,12 @@ class UserProfileUpdateSerializer(serializers.ModelSerializer):
         # Update the instance with the validated data and return it
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
+        if 'image' in validated_data:
+            # The old copies don't match the new image; the job worker builds its own
+            instance.image_variants = {}
         instance.save()
+        if 'image' in validated_data and instance.image:
+            jobs.enqueue('profile_image_variants', {'user_id': instance.pk, 'image': instance.image.name})
         return instance
     
 
@@ -175,13 +230,13 @@ class SetNewPasswordSerializer(serializers.Serializer):
             raise serializers.ValidationError("The reset link is invalid.", code='invalid_link')
         
 
-class ActivityLogSerializer(serializers.ModelSerializer):
+class ActivityLogSerializer(async_serializers.ModelSerializer):
     class Meta:
         model = ActivityLog
         fields = '__all__'
         read_only_fields = ['user', 'date', 'time']  # Include time as read-only
 
-class StepLogSerializer(serializers.ModelSerializer):
+class StepLogSerializer(async_serializers.ModelSerializer):
     class Meta:
         model = StepLog
         fields = '__all__'
@@ -192,4 +247,12 @@ class StepLogSerializer(serializers.ModelSerializer):
 class TipSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tip
-        fields = ['id', 'content']
\ No newline at end of file
+        fields = ['id', 'content']
+
+
+# Read-only renderings of the serializers above for large lists (see api.fast_serializers)
+FOOD_VALUES = ValuesSerializer(FoodSerializer)
+MEAL_VALUES = ValuesSerializer(MealSerializer)
+WATER_ENTRY_VALUES = ValuesSerializer(WaterEntrySerializer)
+ACTIVITY_LOG_VALUES = ValuesSerializer(ActivityLogSerializer)
+STEP_LOG_VALUES = ValuesSerializer(StepLogSerializer)
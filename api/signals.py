@@ -0,0 +1,105 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import changes, nutrition, rollups, user_cache
+from .catalog import FOOD_CATALOG, bump_catalog_version
+from .models import Food, Meal, User
+
+
+@receiver([post_save, post_delete], sender=Food)
+def food_catalog_changed(sender, **kwargs):
+    bump_catalog_version(FOOD_CATALOG)
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Profile updates (UserProfileUpdateView), password resets and logins
+    user_cache.forget(instance.pk)
+
+
+def remember_rollup_values(sender, instance, raw=False, **kwargs):
+    # Updates need the old values to take them back out of the rollups
+    if raw or instance._state.adding:
+        return
+    previous = sender.objects.filter(pk=instance.pk).first()
+    instance._previous_rollup = (previous.user_id, *rollups.rollup_values(previous)) if previous else None
+
+
+def update_rollups(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous_rollup", None)
+    if previous:
+        user_id, metric, day, value = previous
+        rollups.record(user_id, metric, day, -value, -1)
+    instance._previous_rollup = None
+    rollups.record(instance.user_id, *rollups.rollup_values(instance))
+
+
+def deleted_with_user(origin):
+    """Whether a post_delete comes from deleting the entry's user (or users)."""
+    return isinstance(origin, User) or getattr(origin, "model", None) is User
+
+
+def remove_from_rollups(sender, instance, origin=None, **kwargs):
+    # The user's rollups are going too; re-creating them would break the foreign key
+    if deleted_with_user(origin):
+        return
+    metric, day, value = rollups.rollup_values(instance)
+    rollups.record(instance.user_id, metric, day, -value, -1)
+
+
+for model in rollups.SOURCE_METRICS:
+    pre_save.connect(remember_rollup_values, sender=model)
+    post_save.connect(update_rollups, sender=model)
+    post_delete.connect(remove_from_rollups, sender=model)
+
+
+@receiver(pre_save, sender=Meal)
+def remember_meal_totals(sender, instance, raw=False, **kwargs):
+    # Updates need the old totals to take them back out of the day's summary
+    if raw or instance._state.adding:
+        return
+    previous = sender.objects.filter(pk=instance.pk).first()
+    instance._previous_totals = nutrition.meal_totals(previous) if previous else None
+
+
+@receiver(post_save, sender=Meal)
+def update_nutrition_summary(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    user_id, day, totals = nutrition.meal_totals(instance)
+    previous = getattr(instance, "_previous_totals", None)
+    instance._previous_totals = None
+    if previous and previous[:2] == (user_id, day):
+        # Same day: a single update by the difference
+        nutrition.apply_delta(user_id, day, 0, {total: value - previous[2][total] for total, value in totals.items()})
+        return
+    if previous:
+        nutrition.apply_delta(previous[0], previous[1], -1, {total: -value for total, value in previous[2].items()})
+    nutrition.apply_delta(user_id, day, 1, totals)
+
+
+@receiver(post_delete, sender=Meal)
+def remove_from_nutrition_summary(sender, instance, origin=None, **kwargs):
+    # Also meals deleted along with their food, or from the admin
+    if not deleted_with_user(origin):
+        nutrition.apply_meal(instance, -1)
+
+
+def log_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        changes.record(instance.user_id, sender, [instance.pk])
+
+
+def log_deletion(sender, instance, origin=None, **kwargs):
+    # Entries deleted along with their user need no tombstone, nor could one be stored
+    if deleted_with_user(origin):
+        return
+    changes.record(instance.user_id, sender, [instance.pk], deleted=True)
+
+
+# After the rollup receivers, so writers lock rollup rows before the user row
+for model in changes.KINDS:
+    post_save.connect(log_change, sender=model)
+    post_delete.connect(log_deletion, sender=model)
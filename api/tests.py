@@ -1,3 +1,573 @@
-from django.test import TestCase
+import json
+import random
+import tempfile
+from importlib import import_module
+from datetime import date, time, timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver
+from django.urls.resolvers import URLResolver
+from django.utils.timezone import now
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import changes, jobs, search, user_cache
+from .benchmark import CASES, UNBENCHMARKED, BenchmarkTestCase, api_client
+from .management.commands.load_catalog import iter_json_records
+from .models import ActivityLog, Change, Food, Job, Meal, MetricRollup, StepLog, User, WaterLog
+from .nutrition import get_daily_totals
+from .seeding import bulk_insert, generate_history
+from .serializers import (
+    ACTIVITY_LOG_VALUES, FOOD_VALUES, MEAL_VALUES, STEP_LOG_VALUES, WATER_ENTRY_VALUES,
+    ActivityLogSerializer, FoodSerializer, MealSerializer, StepLogSerializer, WaterEntrySerializer,
+)
+from .views import MAX_BULK_MEALS
+
+
+def url_names(resolver=None, namespace=None):
+    """Every named route reachable from the root URLconf, with namespaces."""
+    resolver = resolver or get_resolver()
+    names = set()
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace == "admin":
+                continue
+            inner = f"{namespace}:{pattern.namespace}" if namespace and pattern.namespace else (pattern.namespace or namespace)
+            names |= url_names(pattern, inner)
+        elif pattern.name:
+            names.add(f"{namespace}:{pattern.name}" if namespace else pattern.name)
+    return names
+
+
+class EndpointBenchmarkTests(BenchmarkTestCase):
+    def test_every_endpoint_has_a_benchmark(self):
+        missing = url_names() - UNBENCHMARKED - {case.name for case in CASES}
+        self.assertFalse(missing, f"Add a BenchmarkCase for: {', '.join(sorted(missing))}")
+
+    def test_api_and_router_endpoints(self):
+        self.run_cases([case for case in CASES if not case.name.startswith("health:")])
+
+    def test_values_serializers_match_drf_output(self):
+        # Rows with the optional fields left empty, next to the seeded ones
+        Meal.objects.create(user=self.user, calories=120)
+        ActivityLog.objects.create(user=self.user, activity_type="yoga", duration_minutes=30)
+        renderer = JSONRenderer()
+        for values, serializer_class, model in [
+            (FOOD_VALUES, FoodSerializer, Food),
+            (MEAL_VALUES, MealSerializer, Meal),
+            (WATER_ENTRY_VALUES, WaterEntrySerializer, WaterLog),
+            (ACTIVITY_LOG_VALUES, ActivityLogSerializer, ActivityLog),
+            (STEP_LOG_VALUES, StepLogSerializer, StepLog),
+        ]:
+            queryset = model.objects.order_by("id")
+            with self.subTest(serializer=serializer_class.__name__):
+                self.assertTrue(queryset.exists())
+                self.assertEqual(renderer.render(values.data(queryset)),
+                                 renderer.render(serializer_class(queryset, many=True).data))
+
+
+class DashboardQueryCountTests(TestCase):
+    def test_query_count_does_not_grow_with_history(self):
+        user = User.objects.create_user(
+            username="dash", email="dash@example.com", password="x",
+            weight=70, height=1.75, gender="male", waist_circ=82, hip_circ=98,
+        )
+        foods = [Food.objects.create(name="Rice", energy_kcal=130, protein=2.7, fat=0.3, carbohydrates=28)]
+        client = api_client(user)
+        today = now().date()
+
+        def dashboard_queries():
+            # Nothing cached: the user row and health metrics are loaded every time
+            cache.clear()
+            user_cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                response = client.get(f"/api/dashboard/?date={today}")
+            self.assertEqual(response.status_code, 200)
+            return len(captured), response.json()
+
+        bulk_insert(generate_history(user.id, foods, today, 1, random.Random(0)))
+        one_day, first = dashboard_queries()
+        self.assertIsNotNone(first["health_metrics"])
+
+        bulk_insert(generate_history(user.id, foods, today - timedelta(days=730), 730, random.Random(1)))
+        bulk_insert(generate_history(user.id, foods, today, 1, random.Random(2)))
+        two_years, second = dashboard_queries()
+        self.assertGreater(len(second["water"]["entries"]), len(first["water"]["entries"]))
+        self.assertEqual(two_years, one_day)
+
+
+class TokenUserTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(username="token", email="token@example.com", password="x")
+        self.client = api_client(self.user)
+
+    def assertRejected(self):
+        for method, path, data in [
+            ("get", "/api/profile/", None),
+            ("post", "/api/water/log/", {"amount": 0.25}),
+            ("get", "/health/metrics/", None),
+        ]:
+            # Whether or not an earlier request left the row in the user cache
+            for _ in range(2):
+                with self.subTest(path=path):
+                    response = getattr(self.client, method)(path, data, format="json")
+                    self.assertEqual(response.status_code, 401)
+        self.assertFalse(WaterLog.objects.filter(user_id=self.user.pk).exists())
+
+    def test_deleted_user_token_is_rejected(self):
+        self.assertEqual(self.client.get("/api/profile/").status_code, 200)
+        User.objects.filter(pk=self.user.pk).delete()
+        user_cache.clear()
+        self.assertRejected()
+
+    def test_deactivated_user_token_is_rejected(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertRejected()
+
+
+class LoginTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="login", email="login@example.com", password="Passw0rd!")
+        self.client = api_client()
+
+    def login(self, **extra):
+        response = self.client.post("/api/token/", {"email": self.user.email, "password": "Passw0rd!", **extra}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_refresh_lifetime_follows_remember_me(self):
+        for remember_me, lifetime in [
+            (False, settings.LOGIN_REFRESH_TOKEN_LIFETIME),
+            (True, settings.REMEMBER_ME_REFRESH_TOKEN_LIFETIME),
+        ]:
+            with self.subTest(remember_me=remember_me):
+                refresh = RefreshToken(self.login(remember_me=remember_me)["refresh"])
+                self.assertEqual(refresh["exp"] - refresh["iat"], lifetime.total_seconds())
+
+    def test_login_keeps_djangos_iteration_count_unless_configured(self):
+        def stored_iterations():
+            return int(User.objects.get(pk=self.user.pk).password.split("$")[1])
+
+        self.assertEqual(stored_iterations(), PBKDF2PasswordHasher.iterations)
+        self.login()
+        self.assertEqual(stored_iterations(), PBKDF2PasswordHasher.iterations)
+        with override_settings(PASSWORD_HASH_ITERATIONS=600000):
+            self.login()
+        self.assertEqual(stored_iterations(), 600000)
+
+
+class NutritionSummaryTests(TestCase):
+    def test_summary_follows_meals_written_outside_the_api(self):
+        user = User.objects.create_user(username="meals", email="meals@example.com", password="x")
+        rice = Food.objects.create(name="Rice", energy_kcal=130, protein=2.7, fat=0.3, carbohydrates=28)
+        beans = Food.objects.create(name="Beans", energy_kcal=340, protein=21, fat=1.2, carbohydrates=60)
+        client = api_client(user)
+        today = now().date()
+
+        for food in (rice, rice, beans):
+            response = client.post("/api/meal/log/", {"food_id": food.id, "portion_size": "medium"}, format="json")
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(get_daily_totals(user, today)["total_calories"], 130 + 130 + 340)
+
+        # As the admin would: edit one meal and move another to yesterday
+        first, second, _ = Meal.objects.filter(user=user).order_by("id")
+        first.calories = 100
+        first.save()
+        second.timestamp -= timedelta(days=1)
+        second.save()
+        self.assertEqual(get_daily_totals(user, today)["total_calories"], 100 + 340)
+        self.assertEqual(get_daily_totals(user, today - timedelta(days=1))["total_calories"], 130)
+
+        # Deleting a food cascades to its meals
+        rice.delete()
+        self.assertFalse(Meal.objects.filter(food_id=rice.id).exists())
+        self.assertEqual(get_daily_totals(user, today)["total_calories"], 340)
+        self.assertEqual(get_daily_totals(user, today - timedelta(days=1))["total_calories"], 0)
+        call_command("rebuild_nutrition_summaries", verify=True, stdout=StringIO())
+
+
+class BulkMealTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="bulk", email="bulk@example.com", password="x")
+        self.rice = Food.objects.create(name="Rice", energy_kcal=130, protein=2.7, fat=0.3, carbohydrates=28)
+        self.client = api_client(self.user)
+
+    def post(self, items):
+        return self.client.post("/api/meal/log/bulk/", {"items": items}, format="json")
+
+    def test_valid_items_are_saved_and_invalid_ones_reported_by_index(self):
+        response = self.post([
+            {"food_id": self.rice.id, "portion_size": "medium"},
+            {"food_id": self.rice.id, "portion_size": "huge"},
+            {"food_id": 999999},
+            {"food_id": self.rice.id, "portion_size": "large"},
+            {"portion_size": "small"},
+        ])
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual([meal["index"] for meal in body["created"]], [0, 3])
+        self.assertEqual([meal["calories"] for meal in body["created"]], [130, 195])
+        self.assertEqual([error["index"] for error in body["errors"]], [1, 2, 4])
+        self.assertEqual(body["errors"][1]["errors"], {"food_id": ["Food not found"]})
+
+        # bulk_create sends no signals, so the view keeps the summary and change log itself
+        meal_ids = [meal["id"] for meal in body["created"]]
+        self.assertEqual(sorted(Meal.objects.filter(user=self.user).values_list("id", flat=True)), meal_ids)
+        self.assertEqual(get_daily_totals(self.user, now().date())["total_calories"], 130 + 195)
+        self.assertEqual(
+            list(Change.objects.filter(user=self.user).values_list("kind", "object_id", "deleted")),
+            [("meal", meal_id, False) for meal_id in meal_ids],
+        )
+        call_command("rebuild_nutrition_summaries", verify=True, stdout=StringIO())
+
+    def test_batches_without_valid_items_or_over_the_limit_are_rejected(self):
+        response = self.post([{"food_id": 999999}, {"portion_size": "small"}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error["index"] for error in response.json()["errors"]], [0, 1])
+
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertEqual(self.post([{"food_id": self.rice.id}] * (MAX_BULK_MEALS + 1)).status_code, 400)
+        self.assertFalse(Meal.objects.filter(user=self.user).exists())
+        self.assertEqual(self.post([{"food_id": self.rice.id}] * MAX_BULK_MEALS).status_code, 201)
+
+
+def _failing_job(**payload):
+    raise RuntimeError("SMTP is down")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        handlers = mock.patch.dict(jobs._handlers, {"ok": (lambda **payload: None, False), "fails": (_failing_job, False)})
+        handlers.start()
+        self.addCleanup(handlers.stop)
+
+    def make_due(self, job):
+        Job.objects.filter(pk=job.pk).update(run_at=now())
+
+    def test_workers_never_claim_the_same_job(self):
+        first = jobs.enqueue("ok")
+        second = jobs.enqueue("ok")
+        later = jobs.enqueue("ok", delay=timedelta(minutes=5))
+
+        claimed = jobs.claim("worker-a", 10)
+        self.assertEqual([job.pk for job in claimed], [first.pk, second.pk])
+        self.assertTrue(all(job.status == Job.RUNNING and job.attempts == 1 for job in claimed))
+        self.assertEqual(jobs.claim("worker-b", 10), [])
+
+        # A running job whose worker went away is claimed again after LOCK_TIMEOUT
+        Job.objects.filter(pk=first.pk).update(locked_at=now() - jobs.LOCK_TIMEOUT - timedelta(seconds=1))
+        reclaimed = jobs.claim("worker-b", 10)
+        self.assertEqual([(job.pk, job.locked_by, job.attempts) for job in reclaimed], [(first.pk, "worker-b", 2)])
+        # The first worker's late result no longer applies to it
+        jobs.finish(claimed[0], None)
+        self.assertTrue(Job.objects.filter(pk=first.pk, locked_by="worker-b").exists())
+        self.assertTrue(Job.objects.filter(pk=later.pk, status=Job.QUEUED).exists())
+
+    def test_claim_without_skip_locked(self):
+        # SQLite and other backends without SKIP LOCKED claim with a conditional UPDATE
+        with mock.patch.object(connection.features, "has_select_for_update_skip_locked", False):
+            job = jobs.enqueue("ok")
+            self.assertEqual([claimed.pk for claimed in jobs.claim("worker-a", 1)], [job.pk])
+            self.assertEqual(jobs.claim("worker-b", 1), [])
+
+    def test_failed_attempts_back_off_then_give_up(self):
+        job = jobs.enqueue("fails", max_attempts=3)
+        for attempt, base_delay in [(1, 10), (2, 20)]:
+            claimed, = jobs.claim("worker", 10)
+            error, = jobs.execute(claimed.kind, [claimed.payload])
+            self.assertIn("SMTP is down", error)
+            started = now()
+            self.assertEqual(jobs.finish(claimed, error), Job.QUEUED)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts, job.locked_by), (Job.QUEUED, attempt, ""))
+            # Doubled every attempt, with up to 20% jitter either way
+            delay = (job.run_at - started).total_seconds()
+            self.assertTrue(base_delay * 0.8 - 1 <= delay <= base_delay * 1.2, delay)
+            self.assertEqual(jobs.claim("worker", 10), [])
+            self.make_due(job)
+
+        claimed, = jobs.claim("worker", 10)
+        self.assertEqual(jobs.finish(claimed, "still down"), Job.FAILED)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.last_error), (Job.FAILED, 3, "still down"))
+        self.make_due(job)
+        self.assertEqual(jobs.claim("worker", 10), [])
+        self.assertLessEqual(jobs.retry_delay(30), jobs.RETRY_MAX_DELAY * 1.2)
+
+    def test_run_jobs_once(self):
+        done = jobs.enqueue("ok")
+        retried = jobs.enqueue("fails")
+        out, err = StringIO(), StringIO()
+        # Keep the test runner's own SIGINT handling
+        with mock.patch("signal.signal"):
+            call_command("run_jobs", once=True, concurrency=2, stdout=out, stderr=err)
+        self.assertIn("1 done, 1 to retry, 0 failed", out.getvalue())
+        self.assertIn(f"fails #{retried.pk} attempt 1/5 failed, will retry", err.getvalue())
+        self.assertFalse(Job.objects.filter(pk=done.pk).exists())
+        self.assertEqual(Job.objects.get(pk=retried.pk).status, Job.QUEUED)
+
+
+class ImportCSVTests(TestCase):
+    def test_bad_rows_are_reported_and_duplicates_skipped(self):
+        user = User.objects.create_user(username="import", email="import@example.com", password="x")
+        client = api_client(user)
+        today = now().date()
+        first, second, future = today - timedelta(days=2), today - timedelta(days=1), today + timedelta(days=1)
+        body = "\n".join([
+            "Date,Time,Activity_Type,Duration_Minutes,Calories_Burned",
+            f"{first},07:30,running,30,300",
+            f"{first},07:30,running,30,300",
+            f"{second},18:00,cycling,45,",
+            "not-a-date,08:00,yoga,20,",
+            f"{second},25:00,yoga,20,",
+            f"{second},09:00,yoga,0,",
+            f"{future},09:00,yoga,20,",
+            f"{second},10:00,walking,15,-5",
+        ]).encode()
+
+        def upload():
+            response = client.post("/api/import/activity/", {"file": SimpleUploadedFile("export.csv", body)})
+            self.assertEqual(response.status_code, 201)
+            return response.json()
+
+        report = upload()
+        self.assertEqual((report["rows"], report["imported"], report["duplicates"], report["rejected"]), (8, 2, 1, 5))
+        self.assertEqual(report["errors"], [
+            {"line": 5, "error": "date must be YYYY-MM-DD"},
+            {"line": 6, "error": "time must be HH:MM or HH:MM:SS"},
+            {"line": 7, "error": "duration_minutes must be a whole number from 1 to 1440"},
+            {"line": 8, "error": "date is in the future"},
+            {"line": 9, "error": "calories_burned must be a non-negative number"},
+        ])
+        self.assertEqual(
+            sorted(ActivityLog.objects.filter(user=user).values_list(
+                "date", "time", "activity_type", "duration_minutes", "calories_burned")),
+            [(first, time(7, 30), "running", 30, 300.0), (second, time(18), "cycling", 45, None)],
+        )
+        self.assertEqual(
+            dict(MetricRollup.objects.filter(user=user, metric="activity_minutes").values_list("date", "total")),
+            {first: 30, second: 45},
+        )
+        self.assertEqual(user.changes.filter(kind="activity").count(), 2)
+
+        # Uploading the same export again adds nothing
+        report = upload()
+        self.assertEqual((report["imported"], report["duplicates"], report["rejected"]), (0, 3, 5))
+        self.assertEqual(ActivityLog.objects.filter(user=user).count(), 2)
+
+
+class SyncTests(TestCase):
+    def test_delta_sync_follows_creates_updates_and_deletes(self):
+        user = User.objects.create_user(username="sync", email="sync@example.com", password="x")
+        rice = Food.objects.create(name="Rice", energy_kcal=130, protein=2.7, fat=0.3, carbohydrates=28)
+        client = api_client(user)
+
+        def sync(since=None):
+            response = client.get("/api/sync/" if since is None else f"/api/sync/?since={since}")
+            self.assertEqual(response.status_code, 200)
+            return response.json()
+
+        def ids(result, kind):
+            return [entry["id"] for entry in result["changes"][kind]["updated"]], result["changes"][kind]["deleted"]
+
+        # Entries written before the change log existed count as created once backfilled
+        water = WaterLog.objects.bulk_create([WaterLog(user=user, amount=0.5), WaterLog(user=user, amount=0.25)])
+        import_module("api.migrations.0020_change").backfill_changes(apps, SimpleNamespace(connection=connection))
+        first = sync()
+        self.assertFalse(first["has_more"])
+        self.assertEqual(ids(first, "water"), ([entry.pk for entry in water], []))
+        self.assertEqual(sync(first["cursor"]), {
+            "cursor": first["cursor"], "has_more": False,
+            "changes": {kind: {"updated": [], "deleted": []} for kind in changes.MODELS},
+        })
+
+        gone_id = client.post("/api/meal/log/", {"food_id": rice.id, "portion_size": "medium"}, format="json").json()["id"]
+        client.put(f"/api/meals/{gone_id}/update/", {"calories": 250}, format="json")
+        client.delete(f"/api/meals/{gone_id}/delete/")  # a tombstone, after two changes
+        steps_id = client.post("/api/steps/log/", {"steps": 1200}, format="json").json()["id"]
+        WaterLog.objects.get(pk=water[0].pk).delete()
+        meal_id = client.post("/api/meal/log/", {"food_id": rice.id, "portion_size": "large"}, format="json").json()["id"]
+        client.put(f"/api/meals/{meal_id}/update/", {"calories": 400}, format="json")
+
+        delta = sync(first["cursor"])
+        self.assertFalse(delta["has_more"])
+        self.assertEqual(ids(delta, "meal"), ([meal_id], [gone_id]))
+        self.assertEqual(delta["changes"]["meal"]["updated"][0]["calories"], 400)
+        self.assertEqual(ids(delta, "steps"), ([steps_id], []))
+        self.assertEqual(ids(delta, "water"), ([], [water[0].pk]))
+
+        # The same seven changes, three per page
+        with mock.patch.object(changes, "PAGE_SIZE", 3):
+            pages = [sync(first["cursor"])]
+            while pages[-1]["has_more"]:
+                pages.append(sync(pages[-1]["cursor"]))
+        self.assertEqual([page["has_more"] for page in pages], [True, True, False])
+        self.assertEqual(pages[-1]["cursor"], delta["cursor"])
+        self.assertEqual(ids(pages[0], "meal"), ([], [gone_id]))
+        self.assertEqual(ids(pages[1], "steps"), ([steps_id], []))
+        self.assertEqual(ids(pages[1], "water"), ([], [water[0].pk]))
+        self.assertEqual(ids(pages[1], "meal"), ([meal_id], []))
+        self.assertEqual(ids(pages[2], "meal"), ([meal_id], []))
+
+        self.assertEqual(client.get("/api/sync/?since=abc").status_code, 400)
+
+
+class WaterHistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="water", email="water@example.com", password="x", daily_water_goal=3)
+        self.client = api_client(self.user)
+
+    def log(self, day, amount):
+        log = WaterLog.objects.create(user=self.user, amount=amount)
+        WaterLog.objects.filter(pk=log.pk).update(date_logged=day)  # date_logged is auto_now_add
+        return log.pk
+
+    def history(self, start, end, **params):
+        return self.client.get("/api/water/history/", {"start_date": start, "end_date": end, **params})
+
+    def test_range_is_grouped_per_day_with_empty_days_filled(self):
+        first = self.log(date(2024, 3, 1), 0.5)
+        second = self.log(date(2024, 3, 1), 0.25)
+        third = self.log(date(2024, 3, 3), 1.0)
+        self.log(date(2024, 3, 4), 2.0)  # outside the range
+        other = User.objects.create_user(username="other", email="other@example.com", password="x")
+        WaterLog.objects.create(user=other, amount=9)
+
+        response = self.history("2024-03-01", "2024-03-03")
+        self.assertEqual(response.status_code, 200)
+        days = response.json()
+        self.assertEqual([day["date"] for day in days], ["2024-03-01", "2024-03-02", "2024-03-03"])
+        self.assertEqual([day["total_water"] for day in days], [0.75, 0, 1.0])
+        self.assertEqual({day["target_water"] for day in days}, {3})
+        self.assertEqual([[entry["id"] for entry in day["entries"]] for day in days], [[first, second], [], [third]])
+
+        totals = self.history("2024-03-01", "2024-03-03", totals_only="true").json()
+        self.assertEqual(totals, [{key: value for key, value in day.items() if key != "entries"} for day in days])
+
+    def test_invalid_ranges_are_rejected(self):
+        for start, end in [
+            ("2024-03-02", "2024-03-01"),  # end before start
+            ("2024-02-30", "2024-03-01"),  # not a real date
+            ("2024-03-01", "03/02/2024"),
+            ("2024-01-01", "2025-01-01"),  # 367 days
+        ]:
+            with self.subTest(start=start, end=end):
+                self.assertEqual(self.history(start, end).status_code, 400)
+        self.assertEqual(self.history("2024-01-01", "2024-12-31").status_code, 200)  # MAX_WATER_HISTORY_DAYS
+
+
+class FoodListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.foods = [
+            Food.objects.create(name=name, energy_kcal=100, protein=1, fat=1, carbohydrates=20)
+            for name in ("Apple", "Banana", "Cherry", "Date", "Elderberry")
+        ]
+        user = User.objects.create_user(username="foods", email="foods@example.com", password="x")
+        self.client = api_client(user)
+
+    def test_etag_changes_when_a_custom_food_is_added(self):
+        response = self.client.get("/api/food/")
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertEqual(len(response.json()), 5)
+        self.assertEqual(self.client.get("/api/food/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get("/api/food/?limit=2", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        created = self.client.post("/api/food/custom/", {
+            "name": "Fig", "energy_kcal": 74, "protein": 0.8, "fat": 0.3, "carbohydrates": 19,
+        }, format="json")
+        self.assertEqual(created.status_code, 201)
+        response = self.client.get("/api/food/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()[-1]["name"], "Fig")
+
+    def test_keyset_pages_cover_the_catalog(self):
+        pages = [self.client.get("/api/food/?limit=2").json()]
+        while pages[-1]["next"] is not None:
+            pages.append(self.client.get(f"/api/food/?limit=2&after={pages[-1]['next']}").json())
+        self.assertEqual([len(page["results"]) for page in pages], [2, 2, 1])
+        self.assertEqual(
+            [food["id"] for page in pages for food in page["results"]],
+            [food.id for food in self.foods],
+        )
+
+        for query in ("limit=0", "limit=501", "limit=two", "limit=2&after=x"):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f"/api/food/?{query}").status_code, 400)
+
+
+class LoadCatalogTests(TestCase):
+    def test_records_split_across_chunks(self):
+        records = [{"name": "Apple", "energy_kcal": 52}, {"name": "Pear, \"Conference\"", "protein": 0.4}]
+        for text in (json.dumps(records), "\n".join(json.dumps(record) for record in records)):
+            for chunk_size in (1, 7, 16, 1 << 16):
+                with self.subTest(chunk_size=chunk_size, ndjson=not text.startswith("[")):
+                    self.assertEqual(list(iter_json_records(StringIO(text), chunk_size=chunk_size)), records)
+
+    def test_partial_records_keep_stored_columns_and_bad_records_are_skipped(self):
+        Food.objects.create(name="Rice", energy_kcal=130, protein=2.7, fat=0.3, carbohydrates=28, fiber=0.4)
+        records = [
+            {"name": "Rice", "energy_kcal": 120},
+            {"name": "Mystery", "protein": 1},  # new, but missing required columns
+            {"name": "Oats", "energy_kcal": 389, "protein": 16.9, "fat": 6.9, "carbohydrates": 66},
+            {"name": "Soup", "energy_kcal": "lots", "protein": 1, "fat": 1, "carbohydrates": 1},
+        ]
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as catalog:
+            json.dump(records, catalog)
+            catalog.flush()
+            stderr = StringIO()
+            call_command("load_catalog", catalog.name, stdout=StringIO(), stderr=stderr)
+
+        rice = Food.objects.get(name="Rice")
+        self.assertEqual((rice.energy_kcal, rice.protein, rice.fiber), (120, 2.7, 0.4))
+        self.assertTrue(Food.objects.filter(name="Oats").exists())
+        self.assertFalse(Food.objects.filter(name__in=["Mystery", "Soup"]).exists())
+        self.assertIn("'Mystery'", stderr.getvalue())
+        self.assertIn("'Soup'", stderr.getvalue())
+
+
+class FoodSearchTests(TestCase):
+    def setUp(self):
+        for name in ("Crème brûlée", "Jalapeño", "Riceberry", "Brown rice", "Rice cake", "Rice", "Licorice"):
+            Food.objects.create(name=name, energy_kcal=100, protein=1, fat=1, carbohydrates=20)
+        patcher = mock.patch.object(search, "_index", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def names(self, query):
+        return [name for _, name in search.get_food_index().search(query)]
+
+    def test_accents_and_case_are_folded(self):
+        self.assertEqual(self.names("creme brulee"), ["Crème brûlée"])
+        self.assertEqual(self.names("BRÛL"), ["Crème brûlée"])
+        self.assertEqual(self.names("jalapeno"), ["Jalapeño"])
+
+    def test_exact_tokens_rank_before_prefixes_and_substrings_do_not_match(self):
+        self.assertEqual(self.names("rice"), ["Rice", "Rice cake", "Brown rice", "Riceberry"])
+        self.assertEqual(self.names("ri ca"), ["Rice cake"])
+        self.assertEqual(self.names("corice"), [])
+
+    def test_index_is_rebuilt_when_the_catalog_changes(self):
+        index = search.get_food_index()
+        self.assertIs(search.get_food_index(), index)
+        self.assertEqual(self.names("basmati"), [])
+
+        Food.objects.create(name="Basmati rice", energy_kcal=121, protein=3.5, fat=0.4, carbohydrates=25)
+        rebuilt = search.get_food_index()
+        self.assertIsNot(rebuilt, index)
+        self.assertEqual(len(rebuilt), len(index) + 1)
+        self.assertEqual(self.names("basmati"), ["Basmati rice"])
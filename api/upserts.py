@@ -0,0 +1,42 @@
+# upserts.py - Atomic increments of the running total tables
+#
+# DailyNutritionSummary and MetricRollup hold one row per key (user and day,
+# plus the metric for rollups) whose columns only ever change by a delta.
+# increment() adds the deltas in a single INSERT ... ON CONFLICT DO UPDATE
+# where the database supports it, and falls back to update-then-create
+# elsewhere. The key fields must be the model's unique constraint.
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+
+def _upsert_sql(model, key_fields, added_fields):
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    keys = [quote(model._meta.get_field(name).column) for name in key_fields]
+    added = [quote(model._meta.get_field(name).column) for name in added_fields]
+    columns = keys + added
+    updates = ", ".join(f"{column} = {table}.{column} + excluded.{column}" for column in added)
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+        f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}"
+    )
+
+
+def increment(model, key, deltas):
+    """Add ``deltas`` (field -> amount) to the ``model`` row matching ``key``, creating it if missing."""
+    if connection.features.supports_update_conflicts_with_target:
+        params = [model._meta.get_field(name).get_db_prep_save(value, connection) for name, value in key.items()]
+        with connection.cursor() as cursor:
+            cursor.execute(_upsert_sql(model, list(key), list(deltas)), [*params, *deltas.values()])
+        return
+
+    updates = {name: F(name) + delta for name, delta in deltas.items()}
+    if model.objects.filter(**key).update(**updates):
+        return
+    try:
+        # Savepoint so a concurrent insert doesn't poison the outer transaction
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        model.objects.filter(**key).update(**updates)
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import RegisterView, MealDeleteView, MealUpdateView, water_history, log_water, meal_summary, create_custom_food, UserProfileUpdateView, LogActivityView, LogStepsView, ActivityHistoryView, StepHistoryView, RequestPasswordResetView, PasswordResetConfirmView, UserProfileView, get_food_details, get_food_list, log_meal, get_all_tips
+from .views import RegisterView, MealDeleteView, MealUpdateView, water_history, rollup_history, log_water, meal_summary, dashboard, create_custom_food, UserProfileUpdateView, LogActivityView, LogStepsView, ActivityHistoryView, StepHistoryView, RequestPasswordResetView, PasswordResetConfirmView, UserProfileView, get_food_details, get_food_list, food_search, calculate_plate, log_meal, log_meals_bulk, get_all_tips, ExportHistoryView, ImportCSVView, SyncView
 from .views import CustomTokenObtainPairView  # Custom view for both email login and remember me functionality
 from rest_framework_simplejwt.views import TokenRefreshView
 
@@ -11,8 +11,11 @@ urlpatterns = [
     path("password-reset/confirm/", PasswordResetConfirmView.as_view(), name="password_reset_confirm"),
     path("tips/", get_all_tips, name="get-all-tips"),
     path("food/", get_food_list, name="get_food_list"),
+    path("food/search/", food_search, name="food_search"),
     path("food/<int:food_id>/<str:portion_size>/", get_food_details, name="get_food_details"),
+    path("food/calculate/", calculate_plate, name="calculate_plate"),
     path("meal/log/", log_meal, name="log_meal"),
+    path("meal/log/bulk/", log_meals_bulk, name="log_meals_bulk"),
     path('meals/<int:meal_id>/update/', MealUpdateView.as_view(), name='meal_update'),
     path('meals/<int:meal_id>/delete/', MealDeleteView.as_view(), name='meal_delete'),
     path("activity/log/", LogActivityView.as_view(), name="log_activity"),
@@ -22,7 +25,12 @@ urlpatterns = [
     path("food/custom/", create_custom_food, name="create_custom_food"),
     path("water/log/", log_water, name="log_water"),
     path('water/history/', water_history, name='water_history'),
+    path('history/<str:metric>/rollup/', rollup_history, name='rollup_history'),
     path("meals/summary/", meal_summary, name="meal_summary"),
+    path("dashboard/", dashboard, name="dashboard"),
+    path("export/", ExportHistoryView.as_view(), name="export_history"),
+    path("import/<str:kind>/", ImportCSVView.as_view(), name="import_csv"),
+    path("sync/", SyncView.as_view(), name="sync"),
 
 
 
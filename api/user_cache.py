@@ -0,0 +1,56 @@
+# user_cache.py - Short-lived per-process cache of User rows for token authentication
+#
+# Rows expire after USER_CACHE_TTL seconds and are dropped when the user is
+# saved or deleted in this process (see signals.py). Other workers can keep
+# serving the old row until it expires, so fields that must never be stale
+# are left out and loaded from the database when read.
+
+import time
+
+from django.conf import settings
+
+# metrics_version keys the health metrics cache and changes on profile and
+# Activity saves; the password hash has no reason to sit in memory.
+UNCACHED_FIELDS = {"password", "metrics_version"}
+
+# Oldest entries are evicted beyond this many users
+MAX_ENTRIES = 10000
+
+_rows = {}
+
+
+def cached_fields(model):
+    """Attribute names of the cached columns, in concrete field order."""
+    return [field.attname for field in model._meta.concrete_fields if field.attname not in UNCACHED_FIELDS]
+
+
+def get(user_id):
+    """The cached ``{attname: value}`` row of a user, or None."""
+    entry = _rows.get(user_id)
+    if entry is None:
+        return None
+    expires, row = entry
+    if expires < time.monotonic():
+        _rows.pop(user_id, None)
+        return None
+    return row
+
+
+def remember(user):
+    """Cache the field values of a user instance that were just loaded from the database."""
+    ttl = settings.USER_CACHE_TTL
+    if ttl <= 0:
+        return
+    _rows.pop(user.pk, None)
+    while len(_rows) >= MAX_ENTRIES:
+        _rows.pop(next(iter(_rows)))
+    row = {attname: user.__dict__[attname] for attname in cached_fields(type(user))}
+    _rows[user.pk] = (time.monotonic() + ttl, row)
+
+
+def forget(user_id):
+    _rows.pop(user_id, None)
+
+
+def clear():
+    _rows.clear()
@@ -1,3 +1,5 @@
+import mimetypes
+
 from django.shortcuts import render
 from django.utils.timezone import now
 from rest_framework import viewsets, generics, permissions
@@ -5,7 +7,11 @@ from rest_framework.status import HTTP_201_CREATED
 from .models import User, Meal, Activity, Progress, Food, Tip, ActivityLog, StepLog, WaterLog
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser
 from rest_framework.decorators import api_view, permission_classes
+from adrf import generics as async_generics
+from adrf.decorators import api_view as async_api_view
+from asgiref.sync import sync_to_async
 from rest_framework.response import Response
 from datetime import timedelta
 from rest_framework_simplejwt.views import TokenObtainPairView
@@ -13,16 +19,33 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework import status
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.contrib.auth import authenticate
-from django.contrib.auth.tokens import PasswordResetTokenGenerator
-from django.utils.http import urlsafe_base64_encode
-from django.utils.encoding import smart_bytes
-from django.core.mail import send_mail
 from django.conf import settings
 from django.utils.dateparse import parse_date
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.core.files.storage import default_storage
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
 from datetime import datetime
 from django_filters.rest_framework import DjangoFilterBackend
-from .serializers import UserSerializer, WaterLogSerializer, WaterHistorySerializer, WaterEntrySerializer, CustomFoodSerializer, ActivityLogSerializer, StepLogSerializer, MealSerializer, TipSerializer, PasswordResetRequestSerializer, SetNewPasswordSerializer, ActivitySerializer, ProgressSerializer, RegisterSerializer, FoodSerializer, UserProfileSerializer, UserProfileUpdateSerializer
+from health.cache import get_cached_metrics
+from health.signals import METRIC_FIELDS
+from health.views import compute_health_metrics
+from . import jobs, user_cache
+from .authentication import aload_user_fields
+from .catalog import FOOD_CATALOG, get_catalog_version
+from .changes import changes_since, record as record_changes
+from .export import FORMATS as EXPORT_FORMATS, aiterate as aiterate_export, stream_history
+from .images import VARIANT_DIR
+from .importing import KINDS as IMPORT_KINDS, ImportFormatError, import_csv
+from .rollups import PERIODS, ROLLUP_SOURCES, period_totals
+from .search import get_food_index
+from .pagination import AsyncPageNumberPagination
+from .nutrition import PLATE_NUTRIENTS, apply_meals, calculate_nutrients, get_daily_totals, portion_factor
+from .serializers import FOOD_VALUES, MEAL_VALUES, ACTIVITY_LOG_VALUES, STEP_LOG_VALUES, WATER_ENTRY_VALUES, MealLogItemSerializer, PlateSerializer, UserSerializer, WaterLogSerializer, WaterHistorySerializer, WaterEntrySerializer, CustomFoodSerializer, ActivityLogSerializer, StepLogSerializer, MealSerializer, TipSerializer, PasswordResetRequestSerializer, SetNewPasswordSerializer, ActivitySerializer, ProgressSerializer, RegisterSerializer, UserProfileSerializer, UserProfileUpdateSerializer
 
 # Create your views here.
 class UserViewset(viewsets.ModelViewSet):
@@ -38,6 +61,27 @@ class MealViewset(viewsets.ModelViewSet):
     def get_queryset(self):
         return Meal.objects.filter(user=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        # Same output as MealSerializer, rendered from .values_list() rows
+        rows = MEAL_VALUES.rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(MEAL_VALUES.render(rows))
+        return self.get_paginated_response(MEAL_VALUES.render(page))
+
+    # Meal writes also update the day's nutrition summary (signals.py)
+    @transaction.atomic
+    def perform_create(self, serializer):
+        serializer.save()
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+
 
 class ActivityViewset(viewsets.ModelViewSet):
     queryset = Activity.objects.all()
@@ -47,27 +91,66 @@ class ProgressViewset(viewsets.ModelViewSet):
     queryset = Progress.objects.all()
     serializer_class = ProgressSerializer
 
-@api_view(['POST'])
+@async_api_view(['POST'])
 @permission_classes([IsAuthenticated])
-def log_water(request):
+async def log_water(request):
     serializer = WaterLogSerializer(data=request.data)
     if serializer.is_valid():
-        serializer.save(user=request.user)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        await serializer.asave(user=request.user)
+        return Response(await serializer.adata, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-@api_view(['GET'])
+# Longest window water_history will serve in range mode
+MAX_WATER_HISTORY_DAYS = 366
+
+
+async def water_range_history(user, start_date, end_date, totals_only=False):
+    """Build per-day water history for a date range from a single query."""
+    logs = (WaterLog.objects
+            .filter(user=user, date_logged__range=(start_date, end_date))
+            .order_by('date_logged', 'id'))
+
+    # Group the entries per day in one pass over the ordered rows
+    totals = {}
+    entries = {}
+    if totals_only:
+        async for date_logged, amount in logs.values_list('date_logged', 'amount'):
+            totals.setdefault(date_logged, []).append(amount)
+    else:
+        amount = WATER_ENTRY_VALUES.columns.index('amount')
+        async for date_logged, *row in logs.values_list('date_logged', *WATER_ENTRY_VALUES.columns):
+            totals.setdefault(date_logged, []).append(row[amount])
+            entries.setdefault(date_logged, []).append(row)
+
+    target = user.daily_water_goal or 2.5
+    history = []
+    current_date = start_date
+    while current_date <= end_date:
+        day = {
+            "date": current_date,
+            "total_water": sum(totals.get(current_date, [])),
+            "target_water": target,
+        }
+        if not totals_only:
+            day["entries"] = WATER_ENTRY_VALUES.render(entries.get(current_date, []))
+        history.append(day)
+        current_date += timedelta(days=1)
+    return history
+
+
+@async_api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def water_history(request):
+async def water_history(request):
     user = request.user
+    await aload_user_fields(user, 'daily_water_goal')
     date_str = request.GET.get('date')
     start_date_str = request.GET.get('start_date')
     end_date_str = request.GET.get('end_date')
 
     if date_str:
         date = parse_date(date_str)
-        logs = WaterLog.objects.filter(user=user, date_logged=date)
+        logs = [log async for log in WaterLog.objects.filter(user=user, date_logged=date)]
         total = sum(log.amount for log in logs)
         response_data = {
             "date": date,
@@ -78,26 +161,46 @@ def water_history(request):
         return Response(response_data)
 
     elif start_date_str and end_date_str:
-        start_date = parse_date(start_date_str)
-        end_date = parse_date(end_date_str)
-        history = []
-        current_date = start_date
-        while current_date <= end_date:
-            logs = WaterLog.objects.filter(user=user, date_logged=current_date)
-            total = sum(log.amount for log in logs)
-            history.append({
-                "date": current_date,
-                "total_water": total,
-                "target_water": user.daily_water_goal or 2.5,
-                "entries": WaterEntrySerializer(logs, many=True).data
-            })
-            current_date += timedelta(days=1)
-        return Response(history)
+        try:
+            start_date = parse_date(start_date_str)
+            end_date = parse_date(end_date_str)
+        except ValueError:  # well formed but not a real date, e.g. 2024-02-30
+            start_date = end_date = None
+        if not start_date or not end_date:
+            return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=400)
+        if end_date < start_date:
+            return Response({"error": "'end_date' must not be before 'start_date'."}, status=400)
+        if (end_date - start_date).days + 1 > MAX_WATER_HISTORY_DAYS:
+            return Response({"error": f"Date range cannot exceed {MAX_WATER_HISTORY_DAYS} days."}, status=400)
+
+        totals_only = request.GET.get('totals_only', '').lower() in ('1', 'true', 'yes')
+        return Response(await water_range_history(user, start_date, end_date, totals_only=totals_only))
 
     else:
         return Response({"error": "Provide either 'date' or both 'start_date' and 'end_date' in YYYY-MM-DD format."}, status=400)
 
 
+@async_api_view(['GET'])
+@permission_classes([IsAuthenticated])
+async def rollup_history(request, metric):
+    """Daily, weekly or monthly totals of a logged metric from the day rollups."""
+    if metric not in ROLLUP_SOURCES:
+        return Response({"error": f"Unknown metric. Use one of: {', '.join(ROLLUP_SOURCES)}."}, status=404)
+    period = request.GET.get('period', 'day')
+    if period not in PERIODS:
+        return Response({"error": f"'period' must be one of: {', '.join(PERIODS)}."}, status=400)
+    try:
+        start_date = parse_date(request.GET.get('start_date', ''))
+        end_date = parse_date(request.GET.get('end_date', ''))
+    except ValueError:  # well formed but not a real date, e.g. 2024-02-30
+        start_date = end_date = None
+    if not start_date or not end_date:
+        return Response({"error": "Provide both 'start_date' and 'end_date' in YYYY-MM-DD format."}, status=400)
+
+    rows = period_totals(request.user.pk, metric, period, start_date, end_date)
+    return Response([row async for row in rows])
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_custom_food(request):
@@ -124,21 +227,70 @@ def meal_summary(request):
     else:
         parsed_date = now().date()
 
-    meals = Meal.objects.filter(user=request.user, timestamp__date=parsed_date)
-
-    total_calories = sum(meal.calories for meal in meals)
-    total_protein = sum(meal.protein or 0 for meal in meals)
-    total_carbs = sum(meal.carbohydrates or 0 for meal in meals)
-    total_fat = sum(meal.fat or 0 for meal in meals)
+    # Totals are maintained on every meal write, so this is a single row lookup
+    totals = get_daily_totals(request.user, parsed_date)
 
     return Response({
         "date": parsed_date,
-        "total_calories": total_calories,
-        "total_protein": total_protein,
-        "total_carbohydrates": total_carbs,
-        "total_fat": total_fat
+        "total_calories": totals["total_calories"],
+        "total_protein": totals["total_protein"],
+        "total_carbohydrates": totals["total_carbohydrates"],
+        "total_fat": totals["total_fat"]
     })
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard(request):
+    """Everything the home screen shows for ``?date=`` (default today) in one response.
+
+    Combines profile/, meals/summary/, water/history/?date=, the day's steps
+    and activities and health/metrics/ (null until the profile has every
+    measurement they need). The query count doesn't grow with
+    the user's history: one query per table for the day's rows, plus the
+    health metrics' own queries when they aren't cached.
+    """
+    date_str = request.GET.get('date')
+    if date_str:
+        try:
+            day = parse_date(date_str)
+        except ValueError:  # well formed but not a real date, e.g. 2024-02-30
+            day = None
+        if not day:
+            return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=400)
+    else:
+        day = now().date()
+
+    user = request.user
+    water = list(WaterLog.objects.filter(user=user, date_logged=day).order_by('id'))
+    steps = list(StepLog.objects.filter(user=user, date=day).order_by('time', 'id'))
+    activities = list(ActivityLog.objects.filter(user=user, date=day).order_by('time', 'id'))
+    metrics = None
+    # The health metrics need every body measurement; new users may not have entered them yet
+    if all(getattr(user, field) for field in METRIC_FIELDS):
+        metrics, _ = get_cached_metrics(user, lambda: compute_health_metrics(user))
+
+    return Response({
+        "date": day,
+        "profile": UserProfileSerializer(user).data,
+        "nutrition": get_daily_totals(user, day),
+        "water": {
+            "total_water": sum(log.amount for log in water),
+            "target_water": user.daily_water_goal or 2.5,
+            "entries": WaterEntrySerializer(water, many=True).data,
+        },
+        "steps": {
+            "total_steps": sum(log.steps for log in steps),
+            "entries": StepLogSerializer(steps, many=True).data,
+        },
+        "activity": {
+            "total_minutes": sum(log.duration_minutes for log in activities),
+            "total_calories_burned": sum(log.calories_burned or 0 for log in activities),
+            "entries": ActivityLogSerializer(activities, many=True).data,
+        },
+        "health_metrics": metrics,
+    })
+
+
 class MealUpdateView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -147,7 +299,8 @@ class MealUpdateView(APIView):
 
         serializer = MealSerializer(meal, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
             return Response({'message': 'Meal updated successfully.', 'data': serializer.data}, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
@@ -157,7 +310,8 @@ class MealDeleteView(APIView):
 
     def delete(self, request, meal_id):
         meal = get_object_or_404(Meal, id=meal_id, user=request.user)
-        meal.delete()
+        with transaction.atomic():
+            meal.delete()
         return Response({'message': 'Meal deleted successfully.'}, status=status.HTTP_204_NO_CONTENT)
 
 
@@ -179,6 +333,20 @@ class UserProfileView(APIView):
         return Response(serializer.data)
 
     
+def profile_image_variant(request, name):
+    """Serve a resized profile image copy (see api.images).
+
+    Copies are named after their content, so clients may cache them forever.
+    """
+    path = f"{VARIANT_DIR}/{name}"
+    if not default_storage.exists(path):
+        raise Http404
+    with default_storage.open(path) as file:
+        response = HttpResponse(file.read(), content_type=mimetypes.guess_type(name)[0])
+    response["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+
 class UserProfileUpdateView(APIView):
     permission_classes = [IsAuthenticated]  # Only authenticated users can update their profile
 
@@ -209,12 +377,74 @@ class UserProfileUpdateView(APIView):
         print("Serializer errors:", serializer.errors)  # Debugging line
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+# Largest page get_food_list will serve in keyset mode
+MAX_FOOD_PAGE_SIZE = 500
+
+
+def _render_food_page(version, after, limit):
+    """Render one keyset page of the catalog, cached per catalog version."""
+    def _render_body():
+        rows = list(FOOD_VALUES.rows(Food.objects.filter(id__gt=after).order_by('id'))[:limit + 1])
+        has_more = len(rows) > limit
+        foods = FOOD_VALUES.render(rows[:limit])
+        return JSONRenderer().render({
+            "results": foods,
+            "next": foods[-1]["id"] if has_more else None,
+        })
+
+    return cache.get_or_set(f"food_list:{version}:{after}:{limit}", _render_body)
+
+
 @api_view(["GET"])
 def get_food_list(request):
-    """Get a list of all food items"""
-    foods = Food.objects.all()
-    serializer = FoodSerializer(foods, many=True)
-    return Response(serializer.data)
+    """Get a list of all food items.
+
+    Pass ``limit`` (and ``after``, the ``next`` value of the previous page)
+    to page through the catalog instead of downloading it whole.
+    """
+    version = get_catalog_version(FOOD_CATALOG)
+    etag = f'"food-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in parse_etags(if_none_match)):
+        return HttpResponseNotModified(headers=headers)
+
+    limit = request.GET.get("limit")
+    if limit is None:
+        body = cache.get_or_set(
+            f"food_list:{version}",
+            lambda: JSONRenderer().render(FOOD_VALUES.data(Food.objects.order_by('id'))),
+        )
+    else:
+        try:
+            limit = int(limit)
+            after = int(request.GET.get("after", 0))
+        except ValueError:
+            return Response({"error": "'limit' and 'after' must be integers."}, status=400)
+        if not 1 <= limit <= MAX_FOOD_PAGE_SIZE:
+            return Response({"error": f"'limit' must be between 1 and {MAX_FOOD_PAGE_SIZE}."}, status=400)
+        body = _render_food_page(version, after, limit)
+
+    return HttpResponse(body, content_type="application/json", headers=headers)
+
+# Most suggestions food_search returns in one response
+MAX_FOOD_SEARCH_RESULTS = 100
+
+
+@api_view(["GET"])
+def food_search(request):
+    """Search foods by name, accent- and case-insensitively, for typeahead."""
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return Response({"error": "Provide a search term with 'q'."}, status=400)
+    try:
+        limit = min(int(request.GET.get("limit", 20)), MAX_FOOD_SEARCH_RESULTS)
+    except ValueError:
+        return Response({"error": "'limit' must be an integer."}, status=400)
+
+    results = get_food_index().search(query, limit=max(limit, 1))
+    return Response([{"id": food_id, "name": name} for food_id, name in results])
 
 @api_view(["GET"])
 def get_food_details(request, food_id, portion_size):
@@ -243,74 +473,244 @@ def get_food_details(request, food_id, portion_size):
 
 
 @api_view(["POST"])
+def calculate_plate(request):
+    """Compute per-item and total nutrients for a plate of several foods."""
+    serializer = PlateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    items = serializer.validated_data["items"]
+
+    foods = Food.objects.in_bulk({item["food_id"] for item in items})
+    missing = sorted({item["food_id"] for item in items} - foods.keys())
+    if missing:
+        return Response({"error": "Food not found", "food_ids": missing}, status=404)
+
+    plate_foods = [foods[item["food_id"]] for item in items]
+    factors = [
+        portion_factor(food, item.get("portion_size"), item.get("grams"))
+        for food, item in zip(plate_foods, items)
+    ]
+    per_item, totals = calculate_nutrients(plate_foods, factors)
+
+    results = []
+    for food, item, row in zip(plate_foods, items, per_item.tolist()):
+        entry = {
+            "food_id": food.id,
+            "name": food.name,
+            "portion_size": item.get("portion_size"),
+            "grams": item.get("grams"),
+        }
+        # Missing micronutrients come back as NaN; report them as null
+        entry.update({nutrient: None if value != value else value for nutrient, value in zip(PLATE_NUTRIENTS, row)})
+        results.append(entry)
+
+    return Response({
+        "items": results,
+        "totals": dict(zip(PLATE_NUTRIENTS, totals.tolist())),
+    })
+
+
+@sync_to_async
+@transaction.atomic
+def create_meal(user, food, portion_size):
+    """Save a meal (and, through signals.py, its daily summary update) in one transaction.
+
+    The async ORM can't run transactions, so this hops to a sync thread.
+    """
+    factor = portion_factor(food, portion_size)
+    meal = Meal.objects.create(
+        user=user,
+        food=food,
+        portion_size=portion_size,
+        calories=food.energy_kcal * factor,
+        protein=food.protein * factor,
+        fat=food.fat * factor,
+        carbohydrates=food.carbohydrates * factor,
+    )
+    return meal
+
+
+@async_api_view(["POST"])
 @permission_classes([IsAuthenticated])
-def log_meal(request):
+async def log_meal(request):
     """Allows users to log a meal by selecting food and portion size."""
-    user = request.user
     food_id = request.data.get("food_id")
     portion_size = request.data.get("portion_size")
 
     try:
-        food = Food.objects.get(id=food_id)
+        food = await Food.objects.aget(id=food_id)
     except Food.DoesNotExist:
         return Response({"error": "Food not found"}, status=404)
 
-    # Get portion factor
-    portion_factor = {
-        "small": food.portion_small / 100,
-        "medium": food.portion_medium / 100,
-        "large": food.portion_large / 100,
-    }.get(portion_size, 1)
+    meal = await create_meal(request.user, food, portion_size)
+    return Response(MealSerializer(meal).data, status=201)
 
-    # Calculate meal nutrients
-    meal = Meal.objects.create(
-        user=user,
-        food=food,
-        portion_size=portion_size,
-        calories=food.energy_kcal * portion_factor,
-        protein=food.protein * portion_factor,
-        fat=food.fat * portion_factor,
-        carbohydrates=food.carbohydrates * portion_factor,
+
+# Most meals log_meals_bulk accepts in one request
+MAX_BULK_MEALS = 200
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def log_meals_bulk(request):
+    """Log several meals at once, e.g. a full day or a replayed offline queue.
+
+    Valid items are saved together; invalid ones are reported by index.
+    """
+    items = request.data.get("items") if isinstance(request.data, dict) else request.data
+    if not isinstance(items, list) or not items:
+        return Response({"error": "Provide a non-empty list of meal items."}, status=400)
+    if len(items) > MAX_BULK_MEALS:
+        return Response({"error": f"Cannot log more than {MAX_BULK_MEALS} meals at once."}, status=400)
+
+    errors = []
+    valid = []
+    for index, item in enumerate(items):
+        serializer = MealLogItemSerializer(data=item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            errors.append({"index": index, "errors": serializer.errors})
+
+    foods = Food.objects.in_bulk({data["food_id"] for _, data in valid})
+    resolved = []
+    for index, data in valid:
+        if data["food_id"] in foods:
+            resolved.append((index, foods[data["food_id"]], data.get("portion_size")))
+        else:
+            errors.append({"index": index, "errors": {"food_id": ["Food not found"]}})
+
+    meals = []
+    if resolved:
+        per_item, _ = calculate_nutrients(
+            [food for _, food, _ in resolved],
+            [portion_factor(food, portion_size) for _, food, portion_size in resolved],
+        )
+        meals = [
+            Meal(
+                user=request.user,
+                food=food,
+                portion_size=portion_size,
+                calories=calories,
+                protein=protein,
+                fat=fat,
+                carbohydrates=carbohydrates,
+            )
+            for (_, food, portion_size), (calories, protein, fat, carbohydrates) in zip(resolved, per_item[:, :4].tolist())
+        ]
+        with transaction.atomic():
+            Meal.objects.bulk_create(meals)
+            apply_meals(meals)
+            # bulk_create sends no post_save, so log the changes here (which also moves the health metrics on)
+            record_changes(request.user.pk, Meal, [meal.pk for meal in meals])
+
+    errors.sort(key=lambda error: error["index"])
+    created = [
+        {"index": index, **data}
+        for (index, _, _), data in zip(resolved, MealSerializer(meals, many=True).data)
+    ]
+    return Response(
+        {"created": created, "errors": errors},
+        status=status.HTTP_201_CREATED if meals else status.HTTP_400_BAD_REQUEST,
     )
 
-    return Response(MealSerializer(meal).data, status=201)
+
+class ExportHistoryView(APIView):
+    """Download every meal, water, steps, activity and progress entry of the user, oldest first.
+
+    ``?format=ndjson`` (default) or ``csv``; ``?gzip=true`` sends a gzipped file.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def perform_content_negotiation(self, request, force=False):
+        # ``format`` picks the export format here, not a renderer; errors stay JSON
+        renderer = JSONRenderer()
+        return renderer, renderer.media_type
+
+    def get(self, request):
+        fmt = request.GET.get('format', 'ndjson')
+        if fmt not in EXPORT_FORMATS:
+            return Response({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        compress = request.GET.get('gzip', '').lower() in ('1', 'true', 'yes')
+
+        chunks = stream_history(request.user.pk, fmt, compress)
+        if isinstance(request._request, ASGIRequest):
+            chunks = aiterate_export(chunks)
+        filename = f"history-{now().date()}.{fmt}" + (".gz" if compress else "")
+        response = StreamingHttpResponse(chunks, content_type="application/gzip" if compress else EXPORT_FORMATS[fmt])
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class ImportCSVView(APIView):
+    """Import a wearable's CSV export of steps or activities (see api.importing).
+
+    Upload the file as ``file``; the response reports imported, duplicate
+    and rejected rows.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, kind):
+        if kind not in IMPORT_KINDS:
+            return Response({"error": f"kind must be one of: {', '.join(IMPORT_KINDS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "Upload the CSV file as the 'file' field."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            report = import_csv(request.user.pk, kind, upload)
+        except ImportFormatError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=HTTP_201_CREATED)
+
+
+class SyncView(APIView):
+    """Meal, water, steps and activity entries changed since ``?since=<cursor>``.
+
+    Start with ``since=0`` (or no ``since``) for everything, then pass the
+    returned ``cursor``; ask again right away while ``has_more`` is true.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        since = request.GET.get('since', '0')
+        if not since.isdigit():
+            return Response({"error": "since must be a cursor returned by an earlier sync."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(changes_since(request.user.pk, int(since)))
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
+    """Email login that checks the password once and signs a single token pair.
+
+    ``remember_me`` extends the refresh token's lifetime.
+    """
+
     def post(self, request, *args, **kwargs):
         # Get the email and password from the request data
         email = request.data.get('email')  # Expecting email for login
         password = request.data.get('password')
         remember_me = request.data.get('remember_me', False)  # Get the remember_me flag
-        
-        # Default expiration time for access token
-        access_token_lifetime = timedelta(minutes=5) 
-        
-        # Longer expiration for refresh token if "Remember Me" is checked
-        refresh_token_lifetime = timedelta(days=1)  # Default: 1 day
-        if remember_me:
-            refresh_token_lifetime = timedelta(days=30)  # Extend refresh token expiration to 30 days
 
-        # Authenticate user using email
+        # Authenticate user using email; this also upgrades the stored hash if
+        # PASSWORD_HASHERS or PASSWORD_HASH_ITERATIONS changed since it was set
         user = authenticate(request, username=email, password=password)
+        if user is None:
+            return Response({'detail': 'Invalid email or password.'}, status=status.HTTP_401_UNAUTHORIZED)
 
-        # If user is authenticated, generate tokens
-        if user is not None:
-            # Create JWT access and refresh tokens
-            response = super().post(request, *args, **kwargs)
-            
-            if response.status_code == status.HTTP_200_OK:
-                # Generate custom refresh token with custom expiration time
-                refresh_token = RefreshToken.for_user(user)
-                refresh_token.set_exp(lifetime=refresh_token_lifetime)  # Set custom expiration time for refresh token
-                
-                # Add the refresh token to the response
-                response.data['refresh'] = str(refresh_token)
-            
-            return response
+        # The access token is derived from the refresh token instead of signing a new pair
+        refresh_token = RefreshToken.for_user(user)
+        if remember_me:
+            refresh_token.set_exp(lifetime=settings.REMEMBER_ME_REFRESH_TOKEN_LIFETIME)
         else:
-            return Response({'detail': 'Invalid email or password.'}, status=status.HTTP_401_UNAUTHORIZED)
-        
+            refresh_token.set_exp(lifetime=settings.LOGIN_REFRESH_TOKEN_LIFETIME)
+
+        # The client's next requests authenticate with this user; spare them the row lookup
+        user_cache.remember(user)
+        return Response({'refresh': str(refresh_token), 'access': str(refresh_token.access_token)})
+
 
 class RequestPasswordResetView(generics.GenericAPIView):
     serializer_class = PasswordResetRequestSerializer
@@ -319,21 +719,8 @@ class RequestPasswordResetView(generics.GenericAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        email = serializer.validated_data["email"]
-        user = User.objects.get(email=email)
-        uidb64 = urlsafe_base64_encode(smart_bytes(user.id))
-        token = PasswordResetTokenGenerator().make_token(user)
-
-        # Construct reset URL (you'd ideally have a frontend to handle this)
-        reset_url = f"{settings.FRONTEND_BASE_URL}/reset-password?uidb64={uidb64}&token={token}"
-
-        send_mail(
-            subject="Reset Your Password",
-            message=f"Click the link to reset your password: {reset_url}",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[email],
-            fail_silently=False,
-        )
+        # Sent by the job worker (manage.py run_jobs) so the request doesn't wait on SMTP
+        jobs.enqueue("password_reset_email", {"email": serializer.validated_data["email"]})
 
         return Response({"message": "We’ve emailed you instructions for setting your password."}, status=status.HTTP_200_OK)
 
@@ -347,30 +734,45 @@ class PasswordResetConfirmView(generics.GenericAPIView):
         return Response({"message": "Password has been reset successfully."}, status=status.HTTP_200_OK)
     
 
-class LogActivityView(generics.CreateAPIView):
+class LogActivityView(async_generics.CreateAPIView):
     serializer_class = ActivityLogSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+    async def perform_acreate(self, serializer):
+        await serializer.asave(user=self.request.user)
 
-class LogStepsView(generics.CreateAPIView):
+class LogStepsView(async_generics.CreateAPIView):
     serializer_class = StepLogSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+    async def perform_acreate(self, serializer):
+        await serializer.asave(user=self.request.user)
+
+class ValuesListMixin:
+    """Async list view whose pages are rendered by ``values_serializer`` (see api.fast_serializers)."""
+    values_serializer = None
+
+    async def alist(self, request, *args, **kwargs):
+        rows = self.values_serializer.rows(self.filter_queryset(self.get_queryset()))
+        page = await self.apaginate_queryset(rows)
+        if page is None:
+            return Response(self.values_serializer.render([row async for row in rows]))
+        return await self.get_apaginated_response(self.values_serializer.render(page))
 
-class ActivityHistoryView(generics.ListAPIView):
+class ActivityHistoryView(ValuesListMixin, async_generics.ListAPIView):
     serializer_class = ActivityLogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    values_serializer = ACTIVITY_LOG_VALUES
+    pagination_class = AsyncPageNumberPagination
 
     def get_queryset(self):
         return ActivityLog.objects.filter(user=self.request.user).order_by('-date', '-time')
 
-class StepHistoryView(generics.ListAPIView):
+class StepHistoryView(ValuesListMixin, async_generics.ListAPIView):
     serializer_class = StepLogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    values_serializer = STEP_LOG_VALUES
+    pagination_class = AsyncPageNumberPagination
 
     def get_queryset(self):
         return StepLog.objects.filter(user=self.request.user).order_by('-date', '-time')
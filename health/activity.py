@@ -0,0 +1,39 @@
+# activity.py - Database aggregations over a user's logged activities
+
+from datetime import timedelta
+
+from django.db.models import Case, F, FloatField, Sum, Value, When
+from django.utils.timezone import now
+
+from api.models import Activity, ActivityLog
+from .utils import ACTIVITY_TYPE_METS, DEFAULT_MET, MET_VALUES
+
+
+def _met_minutes(label_field, minutes_field, mets):
+    """SQL expression for MET value x minutes, looking the MET up from a label in ``mets``."""
+    return Case(
+        *[When(**{f"{label_field}__iexact": label}, then=Value(float(met))) for label, met in mets.items()],
+        default=Value(DEFAULT_MET),
+        output_field=FloatField(),
+    ) * F(minutes_field)
+
+
+def weekly_met_minutes(user, today=None):
+    """Total MET-minutes over the 7 days ending ``today``.
+
+    Activity rows are weighted by their intensity and ActivityLog rows by their
+    activity type; both tables are summed in a single UNION query.
+    """
+    today = today or now().date()
+    since = today - timedelta(days=6)
+    activities = (Activity.objects
+                  .filter(user=user, date_logged__date__range=(since, today))
+                  .values("user")
+                  .annotate(met_minutes=Sum(_met_minutes("intensity", "duration", MET_VALUES)))
+                  .values_list("met_minutes", flat=True))
+    logs = (ActivityLog.objects
+            .filter(user=user, date__range=(since, today))
+            .values("user")
+            .annotate(met_minutes=Sum(_met_minutes("activity_type", "duration_minutes", ACTIVITY_TYPE_METS)))
+            .values_list("met_minutes", flat=True))
+    return sum(met_minutes or 0 for met_minutes in activities.union(logs, all=True))
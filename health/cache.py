@@ -0,0 +1,51 @@
+# cache.py - Per-user cache of computed health metrics
+#
+# Entries are keyed by the user's metrics_version, the id of their latest
+# meal or activity log change (api.changes) and today's date. Profile and
+# Activity saves bump the version (see signals.py), logging a meal or
+# activity appends a change anyway, and a new day moves on by itself, so old
+# entries become unreachable in every worker without having to delete them.
+
+from django.core.cache import cache
+from django.db.models import F, OuterRef, Subquery
+from django.utils.timezone import now
+
+from api.models import Change, User
+
+CACHE_TIMEOUT = 60 * 60 * 24
+# Change log kinds of the entries the metrics are computed from
+METRIC_CHANGE_KINDS = ("meal", "activity")
+
+# Per-process counters reported in the X-Metrics-Cache-* response headers
+stats = {"hits": 0, "misses": 0}
+
+
+def metrics_cache_key(user):
+    # One query for both, whether or not the user's metrics_version is loaded
+    last_change = (Change.objects
+                   .filter(user_id=OuterRef("pk"), kind__in=METRIC_CHANGE_KINDS)
+                   .order_by("-id")
+                   .values("id")[:1])
+    version, last_change = (User.objects
+                            .filter(pk=user.pk)
+                            .values_list("metrics_version", Subquery(last_change))
+                            .get())
+    return f"health_metrics:{user.pk}:{version}:{last_change or 0}:{now().date()}"
+
+
+def get_cached_metrics(user, compute):
+    """Return ``(metrics, hit)``, calling ``compute()`` only on a miss."""
+    key = metrics_cache_key(user)
+    metrics = cache.get(key)
+    if metrics is not None:
+        stats["hits"] += 1
+        return metrics, True
+    stats["misses"] += 1
+    metrics = compute()
+    cache.set(key, metrics, CACHE_TIMEOUT)
+    return metrics, False
+
+
+def invalidate_metrics(user_id):
+    """Bump a user's metrics_version so cached metrics are recomputed."""
+    User.objects.filter(pk=user_id).update(metrics_version=F("metrics_version") + 1)
@@ -0,0 +1,58 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from health.utils import calculate_health_metrics, calculate_health_metrics_batch
+
+
+class Command(BaseCommand):
+    help = "Compare the scalar health metric functions with their vectorized batch counterparts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1_000_000)
+        parser.add_argument(
+            "--scalar-users", type=int, default=100_000,
+            help="How many of the users to also run through the scalar loop.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        n = options["users"]
+        columns = {
+            "weight": np.round(rng.uniform(40, 150, n), 1),
+            "height": np.round(rng.uniform(1.45, 2.05, n), 2),
+            "gender": rng.choice(["male", "female", "Male", "Female"], n),
+            "waist": np.round(rng.uniform(55, 130, n), 1),
+            "hip": np.round(rng.uniform(75, 140, n), 1),
+            "duration": rng.integers(0, 120, n).astype(float),
+            "intensity": rng.choice(["walking", "moderate", "vigorous", "yoga"], n),
+            "weekly_met_minutes": np.round(rng.uniform(0, 3000, n), 1),
+        }
+
+        started = time.perf_counter()
+        batch = calculate_health_metrics_batch(**columns)
+        batch_elapsed = time.perf_counter() - started
+
+        sample = min(options["scalar_users"], n)
+        rows = [
+            {name: column[i].item() for name, column in columns.items()}
+            for i in range(sample)
+        ]
+        started = time.perf_counter()
+        scalar = [calculate_health_metrics(**row) for row in rows]
+        scalar_elapsed = time.perf_counter() - started
+
+        for i, expected in enumerate(scalar):
+            for name, value in expected.items():
+                if batch[name][i].item() != value:
+                    raise CommandError(f"User {i}: {name} is {batch[name][i]!r} in batch, {value!r} in scalar")
+
+        batch_rate = n / batch_elapsed
+        scalar_rate = sample / scalar_elapsed
+        self.stdout.write(f"scalar loop: {sample} users in {scalar_elapsed:.2f}s ({scalar_rate:,.0f} users/s)")
+        self.stdout.write(f"batch:       {n} users in {batch_elapsed:.2f}s ({batch_rate:,.0f} users/s)")
+        self.stdout.write(self.style.SUCCESS(
+            f"Results identical for {sample} users; batch is {batch_rate / scalar_rate:.0f}x faster."
+        ))
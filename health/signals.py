@@ -0,0 +1,34 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from api.models import Activity, User
+from .cache import invalidate_metrics
+
+# Profile fields the health metrics are computed from
+METRIC_FIELDS = {"weight", "height", "gender", "waist_circ", "hip_circ"}
+
+
+@receiver(pre_save, sender=User)
+def bump_version_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Increment in the UPDATE itself so a stale instance can't write an old version back
+    if not raw and not instance._state.adding and update_fields is None:
+        instance.metrics_version = F("metrics_version") + 1
+
+
+@receiver(post_save, sender=User)
+def profile_changed(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if created or raw:
+        return
+    if update_fields is not None:
+        if not METRIC_FIELDS & set(update_fields):
+            return
+        invalidate_metrics(instance.pk)
+    instance.refresh_from_db(fields=["metrics_version"])
+
+
+# Meal and ActivityLog writes reach the metrics cache key through the change log
+@receiver([post_save, post_delete], sender=Activity)
+def activity_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_metrics(instance.user_id)
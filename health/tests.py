@@ -1,3 +1,22 @@
 from django.test import TestCase
 
-# Create your tests here.
+from api.benchmark import CASES, BenchmarkTestCase
+from api.models import ActivityLog, User
+from .activity import weekly_met_minutes
+
+
+class HealthBenchmarkTests(BenchmarkTestCase):
+    def test_health_endpoints(self):
+        self.run_cases([case for case in CASES if case.name.startswith("health:")])
+
+
+class WeeklyMetMinutesTests(TestCase):
+    def test_activity_types_have_their_own_met_values(self):
+        runner = User.objects.create_user(username="runner", email="runner@example.com", password="x")
+        walker = User.objects.create_user(username="walker", email="walker@example.com", password="x")
+        ActivityLog.objects.create(user=runner, activity_type="Running", duration_minutes=30)
+        ActivityLog.objects.create(user=walker, activity_type="walking", duration_minutes=30)
+
+        self.assertGreater(weekly_met_minutes(runner), weekly_met_minutes(walker))
+        self.assertAlmostEqual(weekly_met_minutes(walker), 3.3 * 30)
+        self.assertAlmostEqual(weekly_met_minutes(runner), 9.8 * 30)
@@ -1,5 +1,30 @@
 # utils.py - Contains all health-related calculations
 
+import numpy as np
+
+# MET value per activity intensity; anything else counts as DEFAULT_MET
+MET_VALUES = {"walking": 3.3, "moderate": 4, "vigorous": 8}
+DEFAULT_MET = 3.5
+# MET value per logged activity type (ActivityLog.activity_type), after the
+# Compendium of Physical Activities; the intensity labels are accepted too
+ACTIVITY_TYPE_METS = {
+    **MET_VALUES,
+    "running": 9.8,
+    "jogging": 7.0,
+    "cycling": 7.5,
+    "swimming": 6.0,
+    "hiking": 6.0,
+    "dancing": 5.0,
+    "aerobics": 7.3,
+    "rowing": 7.0,
+    "football": 7.0,
+    "basketball": 6.5,
+    "tennis": 7.3,
+    "skipping": 11.8,
+    "strength training": 5.0,
+    "yoga": 2.5,
+}
+
 def calculate_bmi(weight, height):
     """Calculate Body Mass Index (BMI)."""
     return round(weight / (height ** 2), 2)
@@ -28,8 +53,7 @@ def calculate_bmr(lean_body_mass):
 
 def calculate_met_score(weight, duration, intensity):
     """Calculate MET score based on activity intensity and duration."""
-    MET_values = {"walking": 3.3, "moderate": 4, "vigorous": 8}
-    return round(MET_values.get(intensity.lower(), 3.5) * weight * duration, 2)
+    return round(MET_VALUES.get(intensity.lower(), DEFAULT_MET) * weight * duration, 2)
 
 def calculate_calories_burned(met_score, duration, weight):
     """Calculate calories burned during exercise."""
@@ -70,4 +94,180 @@ def calculate_tef(tee):
 
 def calculate_tea(met_score, weight):
     """Calculate Thermic Effect of Activity (TEA)."""
-    return round(met_score * weight, 2)
\ No newline at end of file
+    return round(met_score * weight, 2)
+
+def calculate_health_metrics(weight, height, gender, waist, hip, duration, intensity, weekly_met_minutes):
+    """Compute every calculated metric get_health_metrics reports for one user.
+
+    Returns a dict keyed like the get_health_metrics response; today's
+    calorie intake is read from the database rather than calculated, so it
+    is left to the caller.
+    """
+    bmi = calculate_bmi(weight, height)
+    lbm = calculate_lean_body_mass(weight, height, gender)
+    bmr = calculate_bmr(lbm)
+    met_score = calculate_met_score(weight, duration, intensity)
+    tea = calculate_tea(met_score, weight)
+    tef = calculate_tef(bmr + tea)
+    return {
+        "BMI": bmi,
+        "BMI Category": classify_bmi(bmi),
+        "Lean Body Mass": lbm,
+        "BMR": bmr,
+        "MET Score": met_score,
+        "Calories Burned": calculate_calories_burned(met_score, duration, weight),
+        "Weekly MET Minutes": weekly_met_minutes,
+        "Activity Level": classify_activity_level(weekly_met_minutes),
+        "WHR": calculate_whr(waist, hip),
+        "WHR Risk Category": classify_whr(waist, hip, gender),
+        "TEA": tea,
+        "TEF": tef,
+        "TEE": calculate_tee(bmr, tea, tef),
+    }
+
+# Vectorized counterparts of the functions above. Each accepts NumPy arrays
+# (or anything np.asarray understands) for whole cohorts and returns results
+# identical to calling the scalar function element by element.
+
+
+def _round2(values):
+    """Round to 2 decimals exactly like Python's round(x, 2).
+
+    Python rounds the exact binary value of x, while np.round rounds the
+    already-rounded product x * 100. The two only disagree when that product
+    lands exactly on a .5 tie, so for those elements the rounding error of the
+    multiplication (Dekker's two-product) decides which way the true value lies.
+    """
+    values = np.asarray(values, dtype=float)
+    scaled = values * 100
+    rounded = np.round(scaled)
+    with np.errstate(invalid="ignore"):
+        tie = np.abs(scaled - np.trunc(scaled)) == 0.5
+        if tie.any():
+            split = values * 134217729.0  # 2**27 + 1
+            high = split - (split - values)
+            error = (high * 100 - scaled) + (values - high) * 100
+            rounded = np.where(tie & (error > 0), np.ceil(scaled), rounded)
+            rounded = np.where(tie & (error < 0), np.floor(scaled), rounded)
+    result = rounded / 100
+    # Past ~1e13 the product is no longer exact enough to reason about; defer to Python
+    huge = np.abs(values) >= 1e13
+    if huge.any():
+        result[huge] = [round(value, 2) for value in values[huge].tolist()]
+    return result
+
+
+def _lower(labels):
+    """Lowercase a column of labels, touching each distinct label once."""
+    uniques, inverse = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+    return np.array([label.lower() for label in uniques.tolist()], dtype=str)[inverse]
+
+
+def _is_male(gender):
+    return _lower(gender) == "male"
+
+
+def calculate_bmi_batch(weight, height):
+    """Vectorized calculate_bmi."""
+    height = np.asarray(height, dtype=float)
+    return _round2(np.asarray(weight, dtype=float) / (height * height))
+
+def classify_bmi_batch(bmi):
+    """Vectorized classify_bmi."""
+    bmi = np.asarray(bmi, dtype=float)
+    return np.select(
+        [bmi < 18.5, (18.5 <= bmi) & (bmi < 24.9), (25 <= bmi) & (bmi < 29.9)],
+        ["Underweight", "Normal weight", "Overweight"],
+        default="Obesity",
+    )
+
+def calculate_lean_body_mass_batch(weight, height, gender):
+    """Vectorized calculate_lean_body_mass."""
+    weight = np.asarray(weight, dtype=float)
+    height = np.asarray(height, dtype=float)
+    return _round2(np.where(
+        _is_male(gender),
+        0.407 * weight + 0.267 * height - 19.2,
+        0.252 * weight + 0.473 * height - 48.3,
+    ))
+
+def calculate_bmr_batch(lean_body_mass):
+    """Vectorized calculate_bmr."""
+    return _round2(500 + 22 * np.asarray(lean_body_mass, dtype=float))
+
+def calculate_met_score_batch(weight, duration, intensity):
+    """Vectorized calculate_met_score."""
+    intensity = _lower(intensity)
+    met = np.full(intensity.shape, DEFAULT_MET)
+    for name, value in MET_VALUES.items():
+        met[intensity == name] = value
+    return _round2(met * np.asarray(weight, dtype=float) * np.asarray(duration, dtype=float))
+
+def calculate_calories_burned_batch(met_score, duration, weight):
+    """Vectorized calculate_calories_burned."""
+    return _round2(np.asarray(met_score, dtype=float) * np.asarray(duration, dtype=float) * np.asarray(weight, dtype=float))
+
+def classify_activity_level_batch(met_minutes):
+    """Vectorized classify_activity_level."""
+    met_minutes = np.asarray(met_minutes, dtype=float)
+    return np.select(
+        [met_minutes < 600, (600 <= met_minutes) & (met_minutes < 1500)],
+        ["Low", "Moderate"],
+        default="High",
+    )
+
+def calculate_whr_batch(waist, hip):
+    """Vectorized calculate_whr."""
+    return _round2(np.asarray(waist, dtype=float) / np.asarray(hip, dtype=float))
+
+def classify_whr_batch(waist, hip, gender):
+    """Vectorized classify_whr."""
+    whr = calculate_whr_batch(waist, hip)
+    male = _is_male(gender)
+    return np.select(
+        [
+            male & (whr < 0.9), male & (0.9 <= whr) & (whr <= 0.99), male,
+            whr < 0.8, (0.8 <= whr) & (whr <= 0.89),
+        ],
+        ["Low Risk", "At Risk", "High Risk", "Low Risk", "At Risk"],
+        default="High Risk",
+    )
+
+def calculate_tee_batch(bmr, tea, tef):
+    """Vectorized calculate_tee."""
+    return _round2(np.asarray(bmr, dtype=float) + np.asarray(tea, dtype=float) + np.asarray(tef, dtype=float))
+
+def calculate_tef_batch(tee):
+    """Vectorized calculate_tef."""
+    return _round2(0.1 * np.asarray(tee, dtype=float))
+
+def calculate_tea_batch(met_score, weight):
+    """Vectorized calculate_tea."""
+    return _round2(np.asarray(met_score, dtype=float) * np.asarray(weight, dtype=float))
+
+def calculate_health_metrics_batch(weight, height, gender, waist, hip, duration, intensity, weekly_met_minutes):
+    """Vectorized calculate_health_metrics for whole columns of users.
+
+    Returns a dict of arrays keyed like calculate_health_metrics.
+    """
+    bmi = calculate_bmi_batch(weight, height)
+    lbm = calculate_lean_body_mass_batch(weight, height, gender)
+    bmr = calculate_bmr_batch(lbm)
+    met_score = calculate_met_score_batch(weight, duration, intensity)
+    tea = calculate_tea_batch(met_score, weight)
+    tef = calculate_tef_batch(bmr + tea)
+    return {
+        "BMI": bmi,
+        "BMI Category": classify_bmi_batch(bmi),
+        "Lean Body Mass": lbm,
+        "BMR": bmr,
+        "MET Score": met_score,
+        "Calories Burned": calculate_calories_burned_batch(met_score, duration, weight),
+        "Weekly MET Minutes": np.asarray(weekly_met_minutes, dtype=float),
+        "Activity Level": classify_activity_level_batch(weekly_met_minutes),
+        "WHR": calculate_whr_batch(waist, hip),
+        "WHR Risk Category": classify_whr_batch(waist, hip, gender),
+        "TEA": tea,
+        "TEF": tef,
+        "TEE": calculate_tee_batch(bmr, tea, tef),
+    }
@@ -0,0 +1,130 @@
+# metrics.py - Prometheus request metrics, labelled by resolved URL name
+#
+# With PROMETHEUS_MULTIPROC_DIR set (see gunicorn.conf.py) every gunicorn
+# worker writes its samples to that shared directory and the scrape view
+# merges them, so the numbers cover all workers rather than whichever one
+# happened to serve the scrape.
+
+import hmac
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from decouple import config
+from django.conf import settings
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess,
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by URL name.",
+    ["view", "method"], buckets=LATENCY_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds", "Time spent in database queries per request.",
+    ["view", "method"], buckets=LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_queries", "Database queries per request.",
+    ["view", "method"], buckets=(1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests currently being handled.",
+    ["view"], multiprocess_mode="livesum",
+)
+REQUEST_ERRORS = Counter(
+    "http_request_errors_total", "Responses with a 4xx or 5xx status, or unhandled exceptions.",
+    ["view", "method", "status"],
+)
+
+# Label for requests that never resolved to a view (404s, admin static files...)
+UNRESOLVED = "unresolved"
+
+
+def view_label(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else UNRESOLVED
+
+
+class PrometheusMiddleware:
+    """Feed the request metrics above. Place it before RequestMetricsMiddleware
+    so the query counts it collects are available here."""
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        except Exception:
+            REQUEST_ERRORS.labels(view_label(request), request.method, "exception").inc()
+            raise
+        finally:
+            self._leave(request)
+        return self._observe(request, response, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        except Exception:
+            REQUEST_ERRORS.labels(view_label(request), request.method, "exception").inc()
+            raise
+        finally:
+            self._leave(request)
+        return self._observe(request, response, started)
+
+    @staticmethod
+    def _leave(request):
+        in_progress = getattr(request, "_prometheus_in_progress", None)
+        if in_progress is not None:
+            in_progress.dec()
+
+    @staticmethod
+    def _observe(request, response, started):
+        view = view_label(request)
+        REQUEST_LATENCY.labels(view, request.method).observe(time.perf_counter() - started)
+        stats = getattr(request, "query_stats", None)
+        if stats is not None:
+            REQUEST_DB_TIME.labels(view, request.method).observe(stats.duration)
+            REQUEST_QUERIES.labels(view, request.method).observe(stats.count)
+        if response.status_code >= 400:
+            REQUEST_ERRORS.labels(view, request.method, str(response.status_code)).inc()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        gauge = REQUESTS_IN_PROGRESS.labels(view_label(request))
+        gauge.inc()
+        request._prometheus_in_progress = gauge
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint behind a METRICS_TOKEN bearer token.
+
+    Without a token it is only served with DEBUG on.
+    """
+    token = config("METRICS_TOKEN", default="")
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse(status=403)
+    elif not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponse(status=401)
+
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
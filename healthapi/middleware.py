@@ -0,0 +1,151 @@
+import json
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger("healthapi.requests")
+
+# QueryStats of the request being handled. A context variable rather than a
+# per-request connection.execute_wrapper() because async views run their
+# queries on sync_to_async threads, each with its own connection object.
+current_query_stats = ContextVar("current_query_stats", default=None)
+
+
+class QueryStats:
+    """connection.execute_wrapper that counts and times the queries of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+def count_queries(execute, sql, params, many, context):
+    """Execute wrapper installed on every connection, feeding current_query_stats."""
+    stats = current_query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+connection_created.connect(install_query_counter)
+
+
+class RequestMetricsMiddleware:
+    """Measure queries, DB time, view time and rendering (serialization) time.
+
+    The numbers are sent back as a Server-Timing header and logged as one JSON
+    line per request on the ``healthapi.requests`` logger. Requests running
+    more queries than QUERY_BUDGETS allows for their URL name are logged as
+    warnings and marked with an X-Query-Budget-Exceeded header.
+    """
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # The connection may predate this module, so connection_created never saw it
+        install_query_counter(None, connection)
+        stats = QueryStats()
+        request._metrics_timings = {}
+        token = current_query_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_query_stats.reset(token)
+        return self._finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        request._metrics_timings = {}
+        token = current_query_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_query_stats.reset(token)
+        return self._finish(request, response, stats, started)
+
+    def _finish(self, request, response, stats, started):
+        total = time.perf_counter() - started
+        timings = request._metrics_timings
+
+        # DRF responses are rendered after the view returns; see process_template_response
+        view_end = timings.get("view_end", started + total)
+        render_end = timings.get("render_end", view_end)
+        view = view_end - started
+        render = render_end - view_end
+
+        match = getattr(request, "resolver_match", None)
+        url_name = match.view_name if match else None
+        budget = self._budget(match)
+        over_budget = budget is not None and stats.count > budget
+
+        if getattr(settings, "SERVER_TIMING_HEADER", True):
+            response["Server-Timing"] = ", ".join([
+                f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"',
+                f"view;dur={view * 1000:.1f}",
+                f"render;dur={render * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            ])
+        if over_budget:
+            response["X-Query-Budget-Exceeded"] = f"{stats.count}/{budget}"
+
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "url_name": url_name,
+            "status": response.status_code,
+            "queries": stats.count,
+            "db_ms": round(stats.duration * 1000, 2),
+            "view_ms": round(view * 1000, 2),
+            "render_ms": round(render * 1000, 2),
+            "total_ms": round(total * 1000, 2),
+        }
+        if over_budget:
+            record["query_budget"] = budget
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+        request.query_stats = stats
+        return response
+
+    def process_template_response(self, request, response):
+        timings = getattr(request, "_metrics_timings", None)
+        if timings is not None:
+            timings["view_end"] = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: timings.__setitem__("render_end", time.perf_counter()))
+        return response
+
+    @staticmethod
+    def _budget(match):
+        if match is None:
+            return None
+        budgets = getattr(settings, "QUERY_BUDGETS", {})
+        budget = budgets.get(match.view_name, budgets.get(match.url_name))
+        return budget if budget is not None else getattr(settings, "DEFAULT_QUERY_BUDGET", None)
@@ -47,6 +47,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Add this at the top
+    'healthapi.metrics.PrometheusMiddleware',  # Latency histograms for /metrics/
+    'healthapi.middleware.RequestMetricsMiddleware',  # Query counts and Server-Timing per request
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add this for serving static files
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -101,6 +103,21 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Django's default hashers, with PBKDF2 at a configurable work factor. Stored
+# hashes with a different iteration count are rehashed on the next login.
+PASSWORD_HASHERS = [
+    'api.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# PBKDF2 iterations for new password hashes; 0 keeps Django's count (870000 in
+# 5.1). Login CPU cost scales linearly with it, so a deployment may opt into a
+# cheaper count, e.g. 600000 (OWASP's minimum for PBKDF2-SHA256).
+PASSWORD_HASH_ITERATIONS = config('PASSWORD_HASH_ITERATIONS', default=0, cast=int)
+
 
 # Internationalization
 LANGUAGE_CODE = 'en-us'
@@ -125,12 +142,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
+# Bounding box sizes (px) of the resized profile image copies (api.images)
+PROFILE_IMAGE_SIZES = [64, 128, 256, 512]
+
 # Change default user model
 AUTH_USER_MODEL = 'api.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',  # simplejwt with a short-lived per-process User cache
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,  # Returns 10 results per page
@@ -165,11 +185,47 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': False,
 }
 
+# Refresh token lifetime issued by the login view, without and with "remember me"
+LOGIN_REFRESH_TOKEN_LIFETIME = timedelta(days=1)
+REMEMBER_ME_REFRESH_TOKEN_LIFETIME = timedelta(days=30)
+
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+# Override to try emails locally, e.g. EMAIL_HOST=localhost EMAIL_PORT=1025 EMAIL_USE_TLS=False
+# with a debugging server: python -m aiosmtpd -n -l localhost:1025
+EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
+EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER')  # Your email address
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')  # App password or actual password (if less secure apps are enabled)
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+
+# Per-request query/timing instrumentation (healthapi.middleware.RequestMetricsMiddleware)
+SERVER_TIMING_HEADER = True
+# Max queries per URL name; requests over budget are logged as warnings
+QUERY_BUDGETS = {
+    'water_history': 3,
+    'meal_summary': 3,
+    'get_food_list': 2,
+    'food_search': 2,
+    'health:get_health_metrics': 5,
+}
+DEFAULT_QUERY_BUDGET = None
+
+# Seconds a worker may reuse a User row for token authentication (api.user_cache); 0 disables
+USER_CACHE_TTL = config('USER_CACHE_TTL', default=30, cast=int)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'healthapi.requests': {
+            'handlers': ['console'],
+            'level': config('REQUEST_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
@@ -4,8 +4,10 @@ from rest_framework.routers import DefaultRouter
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from rest_framework.reverse import reverse
-from api.views import UserViewset, MealViewset, ActivityViewset, ProgressViewset
+from api.images import VARIANT_DIR
+from api.views import UserViewset, MealViewset, ActivityViewset, ProgressViewset, profile_image_variant
 from django.conf import settings
+from healthapi.metrics import metrics_view
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
@@ -21,15 +23,21 @@ def custom_api_root(request, format=None):
         'profile': reverse('profile', request=request, format=format),
         'update_profile': reverse('profile_update', request=request, format=format),
         'food_list': reverse('get_food_list', request=request, format=format),
+        'food_search': reverse('food_search', request=request, format=format),
+        'calculate_plate': reverse('calculate_plate', request=request, format=format),
         'create_custom_food': reverse('create_custom_food', request=request, format=format),
         'log_meal': reverse('log_meal', request=request, format=format),
+        'log_meals_bulk': reverse('log_meals_bulk', request=request, format=format),
         'meal_summary': reverse('meal_summary', request=request, format=format),
+        'dashboard': reverse('dashboard', request=request, format=format),
         'log_water': reverse('log_water', request=request, format=format),
         'log_activity': reverse('log_activity', request=request, format=format),
         'log_steps': reverse('log_steps', request=request, format=format),
         'water_history': reverse('water_history', request=request, format=format),
         'activity_history': reverse('activity_history', request=request, format=format),
         'steps_history': reverse('steps_history', request=request, format=format),
+        'export_history': reverse('export_history', request=request, format=format),
+        'sync': reverse('sync', request=request, format=format),
         'tips': reverse('get-all-tips', request=request, format=format),
         'password_reset_request': reverse('password_reset_request', request=request, format=format),
         'password_reset_confirm': reverse('password_reset_confirm', request=request, format=format),
@@ -52,9 +60,12 @@ router.root_view_name = 'custom-api-root'
 urlpatterns = [
     path('', custom_api_root, name='custom-api-root'),  # Custom API root
     path('admin/', admin.site.urls),
+    path('metrics/', metrics_view, name='metrics'),  # Prometheus scrape endpoint
     path('', include(router.urls)),  # DRF router URLs
     path('api/', include('api.urls')),  # Your custom API paths
     path('health/', include('health.urls')),  # Health metrics
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    # Served in production too, unlike the static() media route below (DEBUG only)
+    path(f"{settings.MEDIA_URL.strip('/')}/{VARIANT_DIR}/<str:name>", profile_image_variant, name='profile_image_variant'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
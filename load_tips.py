@@ -1,10 +1,5 @@
-import json
-from api.models import Tip
+# Run with: python manage.py shell < load_tips.py
+# (equivalent to: python manage.py load_catalog tips.json --kind tip)
+from django.core.management import call_command
 
-with open('tips.json', 'r') as f:
-    tips = json.load(f)
-
-for tip_data in tips:
-    Tip.objects.create(text=tip_data['text'])
-
-print(f"{len(tips)} tips loaded successfully!")
+call_command('load_catalog', 'tips.json', kind='tip')